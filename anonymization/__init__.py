@@ -1,18 +1,19 @@
-from faker import Faker
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 import re
 from ..utils import replace_large_numbers
+from .faker_pool import FakerPool
+from .names import EmployeeNameMatcher
 from .redact import cutoff_leading_text, cutoff_trailing_text
 
-def replace_employee_names(text, first_names, last_names, locale = None):
-    fake = Faker(locale=locale)
-    for first_name in first_names:
-        text = text.replace(first_name, fake.first_name())
-    for last_name in last_names:
-        text = text.replace(last_name, fake.last_name())
+def replace_employee_names(text, first_names, last_names, locale = None, fake_pool = None, name_matcher = None):
+    """
+    Replaces all employee names in the text with fake names in a single scan.
+    Pass a prebuilt EmployeeNameMatcher as name_matcher to avoid compiling the names on every call.
+    """
+    fake_pool = fake_pool or FakerPool(locale)
+    name_matcher = name_matcher or EmployeeNameMatcher(first_names, last_names)
 
-    return text
+    return name_matcher.replace(text, fake_pool)
 
 def anonymize_report(
         text,
@@ -22,7 +23,9 @@ def anonymize_report(
         upper_cut_off_flags = [],
         locale = None,
         first_names = [],
-        last_names = []
+        last_names = [],
+        fake_pool = None,
+        name_matcher = None
     ):
     """
     Anonymizes a medical report by replacing real names and dates with fake ones.
@@ -34,13 +37,17 @@ def anonymize_report(
         Dictionary containing metadata of the report, like patient names, birthdate, etc.
     - text_date_format: str
         The date format in the original text (default is '%d.%m.%Y').
+    - fake_pool: FakerPool, optional
+        Source of the fake names and dates. If None, a pool for the given locale is used.
+    - name_matcher: EmployeeNameMatcher, optional
+        Prebuilt matcher for first_names and last_names. If None, one is compiled for this call.
 
     Returns:
     - anonymized_text: str
         The anonymized version of the original text.
     """
     
-    fake = Faker(locale=locale)
+    fake_pool = fake_pool or FakerPool(locale)
     
     # Remove titles like 'Dr.' and 'Dr. med.' from names
     def remove_titles(name):
@@ -51,29 +58,31 @@ def anonymize_report(
         # Remove titles and replace names
         if 'first_name' in key:
             clean_name = remove_titles(value)
-            fake_name = fake.first_name()
+            fake_name = fake_pool.first_name()
             text = text.replace(clean_name, fake_name)
             
         if 'last_name' in key:
             clean_name = remove_titles(value)
-            fake_name = fake.last_name()
+            fake_name = fake_pool.last_name()
             text = text.replace(clean_name, fake_name)
         
         # Replace patient's birthdate with a random date in the same year
         if key == 'birthdate':
             birth_date = datetime.strptime(value, '%Y-%m-%d')
-            random_birthdate = datetime(birth_date.year, random.randint(1, 12), random.randint(1, 28))
+            random_birthdate = fake_pool.random_date_in_year(birth_date.year)
             formatted_date = random_birthdate.strftime(text_date_format)
             text = text.replace(datetime.strftime(birth_date, text_date_format), formatted_date)
         
         # Replace examination date with a random date in the same month
         if key == 'examination_date':
             exam_date = datetime.strptime(value, '%Y-%m-%d')
-            random_exam_date = exam_date + timedelta(days=random.randint(-15, 15))
+            random_exam_date = fake_pool.shift_date(exam_date)
             formatted_date = random_exam_date.strftime(text_date_format)
             text = text.replace(datetime.strftime(exam_date, text_date_format), formatted_date)
 
-    text = replace_employee_names(text, first_names, last_names, locale = locale)
+    text = replace_employee_names(
+        text, first_names, last_names, locale = locale, fake_pool = fake_pool, name_matcher = name_matcher
+    )
     text = replace_large_numbers(text)
 
     # Remove all text above the upper cutoff flag
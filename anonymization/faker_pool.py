@@ -0,0 +1,96 @@
+from collections import deque
+from datetime import datetime, timedelta
+import random
+
+class FakerPool:
+    """
+    Provides the fake names and dates used for anonymization.
+
+    Faker instances are expensive to import and build, so one instance per locale is created on first use
+    (not when the pool is created) and shared by all pools of the process. With a buffer_size above 0, fake first names, last names and random date
+    components are pre-generated in bulk and handed out from buffers which are refilled once they run empty.
+
+    Parameters:
+    - locale: str, optional
+        Locale of the Faker instance (default is None, the Faker default locale).
+    - buffer_size: int, optional
+        Number of values generated per refill of each buffer. 0 disables buffering (default is 0).
+
+    Example:
+    ```
+    pool = FakerPool("de_DE", buffer_size=256)
+    pool.first_name()
+    pool.random_date_in_year(1983)
+    ```
+    """
+    # Maximum number of days an examination date is shifted by
+    max_date_shift_days = 15
+
+    _fakers = {}
+
+    def __init__(self, locale = None, buffer_size = 0):
+        self.locale = locale
+        self.buffer_size = buffer_size
+        self._generators = {
+            "first_name": lambda: self.fake.first_name(),
+            "last_name": lambda: self.fake.last_name(),
+            "month_day": lambda: (random.randint(1, 12), random.randint(1, 28)),
+            "date_shift": lambda: random.randint(-self.max_date_shift_days, self.max_date_shift_days),
+        }
+        self._buffers = {kind: deque() for kind in self._generators}
+
+    @property
+    def fake(self):
+        """
+        The shared Faker instance of the pool's locale.
+        """
+        return self.get_faker(self.locale)
+
+    @classmethod
+    def get_faker(cls, locale = None):
+        """
+        Returns the shared Faker instance for the given locale, importing faker and building it on first use.
+        """
+        if locale not in cls._fakers:
+            from faker import Faker
+            cls._fakers[locale] = Faker(locale=locale)
+        return cls._fakers[locale]
+
+    @classmethod
+    def reseed(cls):
+        """
+        Reseeds the shared Faker instances and the random module from system entropy. Forked worker
+        processes inherit the random state of their parent and would otherwise all draw the same fake data.
+        """
+        random.seed()
+        for fake in cls._fakers.values():
+            fake.seed_instance()
+
+    def _take(self, kind):
+        generate = self._generators[kind]
+        if self.buffer_size <= 0:
+            return generate()
+
+        buffer = self._buffers[kind]
+        if not buffer:
+            buffer.extend(generate() for _ in range(self.buffer_size))
+        return buffer.popleft()
+
+    def first_name(self):
+        return self._take("first_name")
+
+    def last_name(self):
+        return self._take("last_name")
+
+    def random_date_in_year(self, year):
+        """
+        Returns a random date (as datetime) within the given year.
+        """
+        month, day = self._take("month_day")
+        return datetime(year, month, day)
+
+    def shift_date(self, date):
+        """
+        Returns the given date shifted by a random number of days (at most max_date_shift_days in either direction).
+        """
+        return date + timedelta(days=self._take("date_shift"))
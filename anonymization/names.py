@@ -0,0 +1,65 @@
+import re
+
+class EmployeeNameMatcher:
+    """
+    Replaces employee names in a report with fake names in a single scan of the text.
+
+    All first and last names are compiled once into one alternation regex with word boundaries.
+    Longer names come first, so "Dela Cruz" wins over a shorter overlapping name. If a name is
+    listed both as first and last name, it is treated as a first name.
+
+    Parameters:
+    - first_names: List[str]
+        First names of employees.
+    - last_names: List[str]
+        Last names of employees.
+
+    Example:
+    ```
+    matcher = EmployeeNameMatcher(["Anja"], ["Lux"])
+    matcher.replace("Dr. Lux, Anja; Lux", FakerPool("de_DE"))
+    # Output: "Dr. Schmidt, Petra; Schmidt"
+    ```
+    """
+    def __init__(self, first_names, last_names):
+        self.name_kinds = {}
+        for last_name in last_names:
+            self.name_kinds[last_name] = "last_name"
+        for first_name in first_names:
+            self.name_kinds[first_name] = "first_name"
+
+        names = sorted(self.name_kinds, key=len, reverse=True)
+        if names:
+            self.pattern = re.compile(r"\b(?:" + "|".join(re.escape(name) for name in names) + r")\b")
+        else:
+            self.pattern = None
+
+    def replace(self, text, fake_pool):
+        """
+        Replaces every employee name in the text. Each distinct name is mapped to one fake name,
+        which is used for all of its occurrences in the text.
+
+        Parameters:
+        - text: str
+            The text containing employee names.
+        - fake_pool: FakerPool
+            Source of the fake first and last names.
+
+        Returns:
+        - str: The text with employee names replaced.
+        """
+        if self.pattern is None:
+            return text
+
+        replacements = {}
+
+        def substitute(match):
+            name = match.group(0)
+            if name not in replacements:
+                if self.name_kinds[name] == "first_name":
+                    replacements[name] = fake_pool.first_name()
+                else:
+                    replacements[name] = fake_pool.last_name()
+            return replacements[name]
+
+        return self.pattern.sub(substitute, text)
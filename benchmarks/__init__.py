@@ -0,0 +1,9 @@
+'''
+Benchmarks for the report processing pipeline.
+
+- corpus: generator of synthetic endoscopy reports (PDF and text) in the layout the settings flags expect.
+- test_benchmarks: pytest-benchmark benchmarks of read_pdf (per text backend), extract_report_meta, anonymize_report and process_new_reports.
+- compare: compares pytest-benchmark results against a stored baseline.
+- bench_*: standalone micro-benchmarks, run with python -m (bench_startup times an empty inbox run in a fresh interpreter,
+  bench_text_backends compares the throughput of the text backends).
+'''
@@ -0,0 +1,63 @@
+'''
+Micro-benchmark of utils.replace_large_numbers on reports with many case number / ID occurrences.
+
+Usage:
+    python -m agl_report_reader.benchmarks.bench_replace_large_numbers [--occurrences 200] [--repeat 5]
+'''
+import argparse
+import random
+import re
+import timeit
+from ..utils import replace_large_numbers
+
+
+def legacy_replace_large_numbers(text):
+    '''
+    Previous implementation (re.findall followed by one str.replace per match), kept for comparison.
+    '''
+    def random_number(n):
+        return ''.join([str(random.randint(0, 9)) for _ in range(n)])
+
+    for number in re.findall(r'\b\d{5,}\b', text):
+        text = text.replace(number, random_number(len(number)))
+
+    return text
+
+def build_report(occurrences, distinct_numbers = 20):
+    '''
+    Builds a report text with the given number of Fallnummer/ID lines, cycling through distinct_numbers numbers.
+    '''
+    numbers = [str(random.randint(10**9, 10**10 - 1)) for _ in range(distinct_numbers)]
+    lines = ["Patient: Mustermann ,Max geb. 01.01.1970 Fallnummer: 0015744097"]
+    for i in range(occurrences):
+        lines.append(f"Befund {i}: Fallnummer: {numbers[i % distinct_numbers]} ID: {random.randint(10**5, 10**6 - 1)} o.B.")
+    return "\n".join(lines)
+
+def run(occurrences = 200, repeat = 5, number = 20):
+    '''
+    Times the legacy and the current implementation on the same report.
+
+    Returns:
+        dict: Best time per call (seconds) of each implementation and the speedup.
+    '''
+    text = build_report(occurrences)
+    legacy = min(timeit.repeat(lambda: legacy_replace_large_numbers(text), repeat=repeat, number=number)) / number
+    current = min(timeit.repeat(lambda: replace_large_numbers(text), repeat=repeat, number=number)) / number
+
+    return {"occurrences": occurrences, "legacy": legacy, "current": current, "speedup": legacy / current}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replace_large_numbers.")
+    parser.add_argument("--occurrences", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for occurrences in args.occurrences:
+        result = run(occurrences, repeat = args.repeat)
+        print(
+            f"{result['occurrences']:>6} occurrences: legacy {result['legacy'] * 1000:.3f} ms, "
+            f"current {result['current'] * 1000:.3f} ms, speedup {result['speedup']:.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''
+Startup benchmark of a short-lived run on an empty inbox, as done by cron jobs: import report_reader, build a
+ReportReader and call process_new_reports. Each run is a fresh interpreter started with -X importtime.
+
+Usage:
+    python -m agl_report_reader.benchmarks.bench_startup [--repeat 5] [--top 10]
+'''
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PACKAGE = __package__.split(".")[0]
+
+# Dependencies which must not be imported when the inbox is empty
+HEAVY_MODULES = ["faker", "gender_guesser", "pdfplumber", "pdfminer", "icecream"]
+
+EMPTY_INBOX_SCRIPT = f'''
+import sys
+from {PACKAGE}.report_reader import ReportReader
+ReportReader(report_root_path=sys.argv[1]).process_new_reports(verbose=False)
+'''
+
+def parse_importtime(stderr):
+    '''
+    Parses the output of python -X importtime.
+
+    Returns:
+        dict: Maps each imported module to its (self, cumulative) import time in microseconds.
+    '''
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        modules[module.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def run_once(report_root_path):
+    '''
+    Runs the empty inbox script in a fresh interpreter.
+
+    Returns:
+        tuple: The wall time in seconds and the parsed import times, see parse_importtime.
+    '''
+    package_parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH = os.pathsep.join(filter(None, [package_parent, os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", EMPTY_INBOX_SCRIPT, report_root_path],
+        env = env, capture_output = True, text = True, check = True
+    )
+    return time.perf_counter() - start, parse_importtime(completed.stderr)
+
+def run(repeat = 5):
+    '''
+    Times repeat empty inbox runs.
+
+    Returns:
+        dict: Best wall time (seconds), cumulative import time of report_reader (seconds) of the best run,
+        its import times per module and the heavy modules which were imported.
+    '''
+    with tempfile.TemporaryDirectory() as report_root_path:
+        runs = [run_once(report_root_path) for _ in range(repeat)]
+    wall_time, modules = min(runs, key = lambda run: run[0])
+    return {
+        "wall_time": wall_time,
+        "import_time": modules[f"{PACKAGE}.report_reader"][1] / 1e6,
+        "modules": modules,
+        "heavy_modules": sorted({module.split(".")[0] for module in modules} & set(HEAVY_MODULES)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup of an empty inbox run.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    result = run(args.repeat)
+    print(f"Empty inbox run: {result['wall_time'] * 1000:.1f} ms wall time, "
+          f"{result['import_time'] * 1000:.1f} ms importing report_reader")
+    print(f"Heavy modules imported: {', '.join(result['heavy_modules']) or 'none'}")
+    print("Slowest imports (self time):")
+    slowest = sorted(result["modules"].items(), key = lambda item: item[1][0], reverse = True)[:args.top]
+    for module, (self_us, cumulative_us) in slowest:
+        print(f"{self_us / 1000:>8.1f} ms  {module}")
+
+if __name__ == "__main__":
+    main()
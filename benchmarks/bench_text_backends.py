@@ -0,0 +1,48 @@
+'''
+Throughput of the read_pdf text backends on a synthetic report corpus.
+
+Usage:
+    python -m agl_report_reader.benchmarks.bench_text_backends [-n 20] [--pages 2] [--repeat 3]
+'''
+import argparse
+import tempfile
+import time
+from ..pdf_reader import TEXT_BACKENDS, read_pdf_text
+from .corpus import generate_corpus
+
+def run(n = 20, pages = 2, repeat = 3, backends = None):
+    '''
+    Reads the corpus repeat times with each backend. Backends whose library is not installed are skipped.
+
+    Returns:
+        dict: Maps each backend to its best throughput in reports per second and pages per second.
+    '''
+    results = {}
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = generate_corpus(corpus_dir, n, pages = pages, seed = 0, text = False)
+        for backend in backends or TEXT_BACKENDS:
+            try:
+                read_pdf_text(paths[0], backend = backend)
+            except ImportError:
+                continue
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for path in paths:
+                    read_pdf_text(path, backend = backend)
+                best = min(best, time.perf_counter() - start)
+            results[backend] = {"reports_per_second": n / best, "pages_per_second": n * pages / best}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the read_pdf text backends.")
+    parser.add_argument("-n", type=int, default=20, help="number of reports")
+    parser.add_argument("--pages", type=int, default=2, help="PDF pages per report")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for backend, result in run(args.n, args.pages, args.repeat).items():
+        print(f"{backend:>10}: {result['reports_per_second']:8.1f} reports/s, {result['pages_per_second']:8.1f} pages/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+'''
+Compares pytest-benchmark results against a stored baseline and reports regressions.
+
+Usage:
+    pytest benchmarks --benchmark-json=benchmark.json
+    python -m agl_report_reader.benchmarks.compare benchmark.json [--baseline PATH] [--threshold 0.1] [--save]
+
+The exit code is 1 if any benchmark's median got slower than the baseline by more than the threshold.
+'''
+import argparse
+import json
+import os
+import shutil
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def load_medians(path):
+    '''
+    Reads a pytest-benchmark JSON file and returns the median duration (seconds) per benchmark name.
+    '''
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {benchmark["name"]: benchmark["stats"]["median"] for benchmark in data["benchmarks"]}
+
+def compare(current, baseline, threshold = 0.1):
+    '''
+    Compares current against baseline medians.
+
+    Args:
+        current (dict): Median per benchmark name of the current run.
+        baseline (dict): Median per benchmark name of the baseline.
+        threshold (float, optional): Relative slowdown above which a benchmark counts as regression. Default is 0.1.
+
+    Returns:
+        List[dict]: One row per benchmark with name, baseline, current, ratio and status
+        ('regression', 'improvement', 'ok' or 'new').
+    '''
+    rows = []
+    for name, median in sorted(current.items()):
+        if name not in baseline:
+            rows.append({"name": name, "baseline": None, "current": median, "ratio": None, "status": "new"})
+            continue
+        ratio = median / baseline[name]
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "baseline": baseline[name], "current": median, "ratio": ratio, "status": status})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pytest-benchmark results against a baseline.")
+    parser.add_argument("results", help="pytest-benchmark JSON file (--benchmark-json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown")
+    parser.add_argument("--save", action="store_true", help="store the results as new baseline")
+    args = parser.parse_args()
+
+    if args.save or not os.path.exists(args.baseline):
+        shutil.copy(args.results, args.baseline)
+        print(f"Saved {args.results} as baseline {args.baseline}.")
+        return 0
+
+    rows = compare(load_medians(args.results), load_medians(args.baseline), args.threshold)
+    for row in rows:
+        if row["status"] == "new":
+            print(f"{row['name']:<40} {'':>12} {row['current'] * 1000:>10.3f} ms  new")
+        else:
+            print(
+                f"{row['name']:<40} {row['baseline'] * 1000:>10.3f} ms {row['current'] * 1000:>10.3f} ms "
+                f"{row['ratio']:>6.2f}x  {row['status']}"
+            )
+
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
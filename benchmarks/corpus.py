@@ -0,0 +1,180 @@
+'''
+Generator of a synthetic endoscopy report corpus for benchmarks and tests.
+
+Each report follows the layout the flags in settings.py expect: a header with the "Patient: ", "Gerät: " and
+"1. Unters.:" lines, findings text mentioning patient and employee names, and the "________________" footer flag.
+Reports are written as plain text and as text-native PDFs.
+
+Usage:
+    python -m agl_report_reader.benchmarks.corpus OUTPUT_DIR [-n 100] [--pages 1] [--seed 0] [--text-only]
+'''
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from faker import Faker
+from ..settings import DEFAULT_SETTINGS
+
+ENDOSCOPES = ["GIF-HQ190", "CF-HQ190L", "GIF-H190", "PCF-H190DL", "TJF-Q190V", "EG-760Z"]
+
+FINDINGS = [
+    "Oesophagus: Regelrechte Schleimhaut, keine Varizen.",
+    "Magen: Fleckige Roetung im Antrum, Biopsien entnommen.",
+    "Duodenum: Unauffaellig bis pars descendens.",
+    "Kolon: Polyp im Sigma ({size} mm), Schlingenabtragung.",
+    "Histologie: Ergebnis folgt, Probe {number}.",
+    "Beurteilung: Kontrolle in {months} Monaten empfohlen.",
+    "Assistenz: {employee}.",
+    "Befund besprochen mit {patient_first_name} {patient_last_name}.",
+]
+
+# Lines per PDF page
+LINES_PER_PAGE = 50
+
+def _single_name(fake, kind):
+    # The extraction patterns only allow word characters, whitespace and hyphens in names
+    while True:
+        name = getattr(fake, kind)()
+        if all(character.isalnum() or character in " -" for character in name):
+            return name
+
+def generate_report_lines(fake, pages = 1, rng = random):
+    '''
+    Generates the lines of one synthetic report.
+
+    Args:
+        fake (Faker): Source of the patient names.
+        pages (int, optional): Number of PDF pages the report should fill. Default is 1.
+        rng (random.Random, optional): Random number generator. Default is the random module.
+
+    Returns:
+        List[str]: The report lines.
+    '''
+    first_name = _single_name(fake, "first_name")
+    last_name = _single_name(fake, "last_name")
+    birthdate = date(1930, 1, 1) + timedelta(days=rng.randint(0, 80 * 365))
+    examination_date = date(2020, 1, 1) + timedelta(days=rng.randint(0, 4 * 365))
+    casenumber = f"{rng.randint(0, 10**10 - 1):010d}"
+    examiner_first_name = rng.choice(DEFAULT_SETTINGS["first_names"])
+    examiner_last_name = rng.choice(DEFAULT_SETTINGS["last_names"])
+    date_format = DEFAULT_SETTINGS["text_date_format"]
+    flags = DEFAULT_SETTINGS["flags"]
+
+    lines = [
+        "Universitaetsklinikum - Interdisziplinaere Endoskopie",
+        f"{flags['patient_info_line']}{last_name} ,{first_name} geb. {birthdate.strftime(date_format)} Fallnummer: {casenumber}",
+        f"{flags['endoscope_info_line']}{rng.choice(ENDOSCOPES)}",
+        f"{flags['examiner_info_line']} Dr. med. {examiner_last_name}, {examiner_first_name} "
+        f"U-datum: {examination_date.strftime(date_format)} {rng.randint(7, 17):02d}:{rng.choice([0, 15, 30, 45]):02d}",
+        f"Indikation: Abklaerung, Fallnummer {casenumber}",
+    ]
+
+    findings_count = max(3, pages * LINES_PER_PAGE - len(lines) - 3)
+    for _ in range(findings_count):
+        lines.append(rng.choice(FINDINGS).format(
+            size=rng.randint(2, 25),
+            number=rng.randint(10**6, 10**7 - 1),
+            months=rng.choice([3, 6, 12, 36]),
+            employee=f"{rng.choice(DEFAULT_SETTINGS['first_names'])} {rng.choice(DEFAULT_SETTINGS['last_names'])}",
+            patient_first_name=first_name,
+            patient_last_name=last_name,
+        ))
+
+    lines.append(flags["cut_off_below"][0])
+    lines.append(f"Dr. med. {examiner_last_name}, {examination_date.strftime(date_format)}")
+    lines.append("Seite 1")
+    return lines
+
+def _escape_pdf_string(line):
+    encoded = line.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def write_report_pdf(path, lines, lines_per_page = LINES_PER_PAGE):
+    '''
+    Writes the lines as a minimal text-native PDF (Helvetica, WinAnsiEncoding), lines_per_page lines per page.
+    '''
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None, # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_numbers = []
+    for page_lines in pages:
+        content = b"BT /F1 10 Tf 14 TL 40 800 Td\n"
+        content += b"".join(b"(" + _escape_pdf_string(line) + b") Tj T*\n" for line in page_lines)
+        content += b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_number = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_number
+        )
+        page_numbers.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_numbers)
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+def generate_corpus(output_dir, n, pages = 1, seed = None, pdf = True, text = True, locale = DEFAULT_SETTINGS["locale"]):
+    '''
+    Generates n synthetic reports in output_dir as report_<i>.pdf and/or report_<i>.txt.
+
+    Args:
+        output_dir (str): Directory the reports are written to, created if missing.
+        n (int): Number of reports.
+        pages (int, optional): Number of PDF pages per report. Default is 1.
+        seed (int, optional): Seed for reproducible corpora. Default is None.
+        pdf (bool, optional): Write PDFs. Default is True.
+        text (bool, optional): Write plain text reports. Default is True.
+        locale (str, optional): Faker locale of the patient names. Default is the settings locale.
+
+    Returns:
+        List[str]: Paths of the written files.
+    '''
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    fake = Faker(locale=locale)
+    if seed is not None:
+        fake.seed_instance(seed)
+
+    paths = []
+    for i in range(n):
+        lines = generate_report_lines(fake, pages = pages, rng = rng)
+        basename = os.path.join(output_dir, f"report_{i:05d}")
+        if pdf:
+            write_report_pdf(basename + ".pdf", lines)
+            paths.append(basename + ".pdf")
+        if text:
+            with open(basename + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            paths.append(basename + ".txt")
+
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic endoscopy report corpus.")
+    parser.add_argument("output_dir")
+    parser.add_argument("-n", type=int, default=100, help="number of reports")
+    parser.add_argument("--pages", type=int, default=1, help="PDF pages per report")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--text-only", action="store_true", help="only write plain text reports")
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.output_dir, args.n, pages = args.pages, seed = args.seed, pdf = not args.text_only)
+    print(f"Wrote {len(paths)} files to {args.output_dir}.")
+
+if __name__ == "__main__":
+    main()
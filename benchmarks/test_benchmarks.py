@@ -0,0 +1,62 @@
+'''
+pytest-benchmark benchmarks of the report processing pipeline on a synthetic corpus.
+
+Usage (from the package root):
+    pytest benchmarks --benchmark-json=benchmark.json
+    python -m agl_report_reader.benchmarks.compare benchmark.json
+'''
+import os
+import shutil
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from ..pdf_reader import read_pdf_text
+from ..report_reader import ReportReader
+from .corpus import generate_corpus
+
+# Number of reports per process_new_reports batch
+BATCH_SIZE = 20
+
+@pytest.fixture(scope="module")
+def corpus_dir(tmp_path_factory):
+    corpus_dir = str(tmp_path_factory.mktemp("corpus"))
+    generate_corpus(corpus_dir, BATCH_SIZE, seed=0)
+    return corpus_dir
+
+@pytest.fixture(scope="module")
+def reader(tmp_path_factory):
+    return ReportReader(report_root_path=str(tmp_path_factory.mktemp("reports")))
+
+@pytest.fixture(scope="module")
+def report_pdf(corpus_dir):
+    return os.path.join(corpus_dir, "report_00000.pdf")
+
+@pytest.fixture(scope="module")
+def report_text(corpus_dir):
+    with open(os.path.join(corpus_dir, "report_00000.txt"), encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("backend", ["pdfplumber", "pdfminer", "pdfium"])
+def test_read_pdf(benchmark, report_pdf, backend):
+    text = benchmark(read_pdf_text, report_pdf, backend=backend)
+    assert text.startswith("Universitaetsklinikum")
+
+def test_extract_report_meta(benchmark, reader, report_text, report_pdf):
+    report_meta = benchmark(reader.extract_report_meta, report_text, report_pdf)
+    assert "casenumber" in report_meta
+
+def test_anonymize_report(benchmark, reader, report_text, report_pdf):
+    report_meta = reader.extract_report_meta(report_text, report_pdf)
+    anonymized_text = benchmark(reader.anonymize_text, report_text, report_meta)
+    assert report_meta["casenumber"] not in anonymized_text
+
+def test_process_new_reports(benchmark, reader, corpus_dir):
+    def fill_inbox():
+        for name in os.listdir(corpus_dir):
+            if name.endswith(".pdf"):
+                shutil.copy(os.path.join(corpus_dir, name), reader.new_report_dir + name)
+        return (), {"verbose": False}
+
+    results = benchmark.pedantic(reader.process_new_reports, setup=fill_inbox, rounds=3)
+    assert len(results["processed"]) == BATCH_SIZE
@@ -0,0 +1,100 @@
+'''
+Persistent index for detecting reports which were already imported, e.g. the same PDF exported twice \
+under different file names.
+'''
+from datetime import datetime
+from .sqlite_db import SqliteDatabase
+
+# Metadata fields identifying an examination, see header_key
+HEADER_KEY_FIELDS = ["casenumber", "examination_date", "examination_time"]
+
+def header_key(report_meta):
+    """
+    Builds the header-level key of a report from its casenumber, examination date and examination time.
+
+    Parameters:
+    - report_meta: dict, metadata as returned by extract_report_meta.
+
+    Returns:
+    - str: The key, or None if one of the fields is missing.
+    """
+    values = [report_meta.get(field) for field in HEADER_KEY_FIELDS]
+    if not all(values):
+        return None
+    return "|".join(values)
+
+class DedupeIndex:
+    '''
+    Maps the SHA-256 of the PDF bytes and the header key of each imported report to its new_filename, \
+    and records the duplicates which were skipped together with the report they duplicate. Reports are \
+    reserved when they are claimed, before their outputs exist, so copies processed at the same time by \
+    other threads or processes are detected too.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SqliteDatabase(path, [
+            "CREATE TABLE IF NOT EXISTS file_hashes (file_hash TEXT PRIMARY KEY, new_filename TEXT NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS header_keys (header_key TEXT PRIMARY KEY, new_filename TEXT NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS duplicates (original_filename TEXT NOT NULL, duplicate_of TEXT NOT NULL, "
+            "detected_at TEXT NOT NULL)",
+        ])
+
+    def find(self, file_hash = None, header_key = None):
+        '''
+        Returns the new_filename of the imported report with the given file hash or header key, None if there is none.
+        '''
+        if file_hash is not None:
+            rows = self.db.execute("SELECT new_filename FROM file_hashes WHERE file_hash = ?", (file_hash,))
+            if rows:
+                return rows[0][0]
+        if header_key is not None:
+            rows = self.db.execute("SELECT new_filename FROM header_keys WHERE header_key = ?", (header_key,))
+            if rows:
+                return rows[0][0]
+        return None
+
+    def reserve(self, new_filename, file_hash = None, header_key = None):
+        '''
+        Registers the file hash and header key of a report which is about to be processed under new_filename, \
+        in one transaction. If another report already holds either of them, nothing is registered and its \
+        new_filename is returned, so of two copies claimed at the same time exactly one is processed. \
+        Returns None if the report was registered.
+        '''
+        with self.db.lock:
+            connection = self.db.connect()
+            with connection:
+                for table, column, value in [("file_hashes", "file_hash", file_hash), ("header_keys", "header_key", header_key)]:
+                    if value is None:
+                        continue
+                    # the insert takes the write lock, so checking and registering can't interleave with other processes
+                    if connection.execute(f"INSERT OR IGNORE INTO {table} VALUES (?, ?)", (value, new_filename)).rowcount:
+                        continue
+                    (duplicate_of,) = connection.execute(
+                        f"SELECT new_filename FROM {table} WHERE {column} = ?", (value,)
+                    ).fetchone()
+                    connection.rollback()
+                    return duplicate_of
+        return None
+
+    def remove(self, new_filename):
+        '''
+        Removes the file hash and header key of a report, e.g. when it failed or its outputs are rolled back.
+        '''
+        self.db.execute("DELETE FROM file_hashes WHERE new_filename = ?", (new_filename,))
+        self.db.execute("DELETE FROM header_keys WHERE new_filename = ?", (new_filename,))
+
+    def add_duplicate(self, original_filename, duplicate_of):
+        self.db.execute(
+            "INSERT INTO duplicates VALUES (?, ?, ?)",
+            (original_filename, duplicate_of, datetime.now().isoformat(timespec = "seconds"))
+        )
+
+    def duplicates(self):
+        '''
+        Returns a list of (original_filename, duplicate_of, detected_at) tuples of all skipped duplicates.
+        '''
+        return self.db.execute("SELECT original_filename, duplicate_of, detected_at FROM duplicates ORDER BY rowid")
+
+    def close(self):
+        self.db.close()
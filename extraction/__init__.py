@@ -1,9 +1,10 @@
-from ..utils import get_line_by_flag
-from .examination_data import extract_examination_info
+from ..utils import get_lines_by_flags
+# Extractors are registered on import, in the order the fields are extracted
 from .patient_data import extract_patient_info
 from .other_data import extract_endoscope_info
-
-from icecream import ic
+from .examination_data import extract_examination_info
+from .registry import FieldExtractor, register_extractor, get_extractors, normalize_date
+from ..tracing import get_tracer, VERBOSE_TRACER
 
 def extract_report_meta(
     text,
@@ -11,21 +12,29 @@ def extract_report_meta(
     endoscope_info_line_flag,
     examiner_info_line_flag,
     gender_detector = None,
-    verbose = True
+    verbose = False,
+    flags = None,
+    layout = "default",
+    tracer = None
 ):
     """
     Extracts metadata from a medical report text based on provided flags.
 
     This function parses the provided text to extract information about the patient, endoscope, and examiner 
     using specified flags. The extracted metadata is returned as a dictionary.
+    The lines of all flags are found in one scan, then every extractor registered for the report layout
+    (see extraction.registry) is run on the line of its flag.
 
     Parameters:
     - text (str): The medical report text from which metadata needs to be extracted.
     - patient_info_line_flag (str): A flag or pattern to identify the line containing patient information.
     - endoscope_info_line_flag (str): A flag or pattern to identify the line containing endoscope information.
     - examiner_info_line_flag (str): A flag or pattern to identify the line containing examiner information.
-    - gender_detector (GenderDetector, optional): An instance of a gender detector for gender estimation based on names. Default is None.
-    - verbose (bool, optional): If set to True, debugging information will be printed using the icecream library. Default is True.
+    - gender_detector (GenderDetector, optional): An instance of a gender detector for gender estimation based on names. Default is None (use the shared detector).
+    - verbose (bool, optional): If set to True and no tracer is given, the per-field results are printed to stderr. Default is False.
+    - flags (dict, optional): Flags of further registered extractors, keyed by flag name. Default is None.
+    - layout (str, optional): Report layout whose registered extractors are used. Default is "default".
+    - tracer (Tracer, optional): Receives a "field_extracted" record per extractor. Default is None (the process-wide tracer, see tracing.configure_tracing).
 
     Returns:
     - dict: A dictionary containing the extracted metadata. The dictionary can have the keys:
@@ -45,26 +54,24 @@ def extract_report_meta(
     Ensure that the provided flags are unique to avoid misidentification of lines in the report.
     """
     report_meta = {}
+    if tracer is None:
+        tracer = VERBOSE_TRACER if verbose else get_tracer()
 
-    patient_info_line = get_line_by_flag(text, patient_info_line_flag)
-    ic(patient_info_line)
-    if patient_info_line:
-        patient_info = extract_patient_info(patient_info_line, gender_detector)
-        ic(patient_info)
-        report_meta.update(patient_info)
-
-    endoscope_info_line = get_line_by_flag(text, endoscope_info_line_flag)
-    ic(endoscope_info_line)
-    if endoscope_info_line:
-        endoscope_info = extract_endoscope_info(endoscope_info_line)
-        ic(endoscope_info)
-        report_meta.update(endoscope_info)
+    line_flags = dict(flags or {})
+    line_flags.update({
+        "patient_info_line": patient_info_line_flag,
+        "endoscope_info_line": endoscope_info_line_flag,
+        "examiner_info_line": examiner_info_line_flag,
+    })
+    extractors = get_extractors(layout)
+    lines = get_lines_by_flags(text, {extractor.flag: line_flags[extractor.flag] for extractor in extractors})
 
-    examiner_info_line = get_line_by_flag(text, examiner_info_line_flag)
-    ic(examiner_info_line)
-    if examiner_info_line:
-        examiner_info = extract_examination_info(examiner_info_line)
-        ic(examiner_info)
-        report_meta.update(examiner_info)
+    for extractor in extractors:
+        line = lines.get(extractor.flag)
+        info = extractor.extract(line, gender_detector=gender_detector) if line else None
+        if tracer.enabled:
+            tracer.trace("field_extracted", extractor=extractor.name, flag=extractor.flag, line=line, result=info)
+        if info:
+            report_meta.update(info)
 
-    return report_meta
\ No newline at end of file
+    return report_meta
@@ -1,5 +1,26 @@
-from datetime import datetime
 import re
+from .registry import FieldExtractor, register_extractor, normalize_date
+
+# Define the regular expression pattern for matching the relevant fields
+EXAMINATION_INFO_PATTERN = re.compile(
+    r"Unters\.: ([\w\s\.]+), ([\w\s]+) U-datum: (\d{2}\.\d{2}\.\d{4}) (\d{2}:\d{2})"
+)
+
+def examination_info_from_match(match, **context):
+    """
+    Builds the examination information dictionary from a match of EXAMINATION_INFO_PATTERN.
+    The examination date is normalized to YYYY-MM-DD.
+    """
+    return {
+        'examiner_last_name': match.group(1).strip(),
+        'examiner_first_name': match.group(2).strip(),
+        'examination_date': normalize_date(match.group(3)),
+        'examination_time': match.group(4)
+    }
+
+EXAMINATION_INFO_EXTRACTOR = register_extractor(
+    FieldExtractor("examination", "examiner_info_line", EXAMINATION_INFO_PATTERN, examination_info_from_match)
+)
 
 def extract_examination_info(line):
     """
@@ -20,32 +41,5 @@ def extract_examination_info(line):
     Output: {'examiner_last_name': 'Dr. med. Lux', 'examiner_first_name': 'Thomas',
              'examination_date': '2023-06-09', 'examination_time': '09:30'}
     """
-    
-    # Define the regular expression pattern for matching the relevant fields
-    pattern = r"Unters\.: ([\w\s\.]+), ([\w\s]+) U-datum: (\d{2}\.\d{2}\.\d{4}) (\d{2}:\d{2})"
-    
-    # Search for the pattern in the given line
-    match = re.search(pattern, line)
-    
-    if match:
-        examiner_last_name = match.group(1).strip()
-        examiner_first_name = match.group(2).strip()
-        
-        # Convert the examination date to the format YYYY-MM-DD
-        examination_date = datetime.strptime(match.group(3), '%d.%m.%Y').strftime('%Y-%m-%d')
-        
-        # Extract the examination time
-        examination_time = match.group(4)
-        
-        info = {
-            'examiner_last_name': examiner_last_name,
-            'examiner_first_name': examiner_first_name,
-            'examination_date': examination_date,
-            'examination_time': examination_time
-        }
-        
-        return info
-    
-    else:
-        return None  # Return None if the pattern doesn't match
-    
+    # Returns None if the pattern doesn't match
+    return EXAMINATION_INFO_EXTRACTOR.extract(line)
@@ -1,4 +1,11 @@
 import re
+from .registry import FieldExtractor, register_extractor
+
+ENDOSCOPE_INFO_PATTERN = re.compile(r"Gerät: (?P<endoscope>[\w\s-]+)")
+
+ENDOSCOPE_INFO_EXTRACTOR = register_extractor(
+    FieldExtractor("endoscope", "endoscope_info_line", ENDOSCOPE_INFO_PATTERN)
+)
 
 def extract_endoscope_info(line):
     '''
@@ -9,11 +16,5 @@ def extract_endoscope_info(line):
     Returns:
         Dictionary assigning the key "endoscope" to the text found by the pattern matching, optimally the name of the instrument used.
     '''
-    pattern = r"Gerät: ([\w\s-]+)"
-
-    match = re.search(pattern, line)
-    if match:
-        endoscope = match.group(1).strip()
-        return {"endoscope": endoscope}
-    else:
-        return None
\ No newline at end of file
+    # Returns None if the pattern doesn't match
+    return ENDOSCOPE_INFO_EXTRACTOR.extract(line)
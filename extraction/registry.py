@@ -0,0 +1,72 @@
+from datetime import datetime
+import re
+
+class FieldExtractor:
+    r"""
+    Declares how a group of report fields is extracted from one line of a report.
+
+    Parameters:
+    - name: str
+        Name of the extractor, e.g. "patient".
+    - flag: str
+        Name of the flag (key of DEFAULT_SETTINGS["flags"]) marking the line that contains the fields.
+    - pattern: str or re.Pattern
+        Regular expression matched against the line. It is compiled once, when the extractor is declared.
+    - postprocess: callable, optional
+        Called as postprocess(match, **context) to turn a match into the field dictionary, e.g. to normalize dates.
+        If None, the stripped named groups of the match are returned.
+
+    Example:
+    ```
+    register_extractor(FieldExtractor("ward", "ward_info_line", r"Station: (?P<ward>\w+)"), layout="vendor_b")
+    ```
+    """
+    def __init__(self, name, flag, pattern, postprocess = None):
+        self.name = name
+        self.flag = flag
+        self.pattern = re.compile(pattern)
+        self.postprocess = postprocess
+
+    def extract(self, line, **context):
+        """
+        Extracts the fields from the given line.
+
+        Parameters:
+        - line: str
+            The line marked by the extractor's flag.
+        - context: dict
+            Additional keyword arguments for the post-processor, e.g. gender_detector.
+
+        Returns:
+        - dict: The extracted fields, or None if the pattern doesn't match.
+        """
+        match = self.pattern.search(line)
+        if not match:
+            return None
+        if self.postprocess is None:
+            return {key: value.strip() for key, value in match.groupdict().items() if value is not None}
+        return self.postprocess(match, **context)
+
+# Registered extractors per report layout
+EXTRACTORS = {}
+
+def register_extractor(extractor, layout = "default"):
+    """
+    Registers a FieldExtractor for the given report layout and returns it.
+    """
+    EXTRACTORS.setdefault(layout, []).append(extractor)
+    return extractor
+
+def get_extractors(layout = "default"):
+    """
+    Returns the extractors registered for the given report layout.
+    """
+    if layout not in EXTRACTORS:
+        raise KeyError(f"No extractors registered for report layout '{layout}'.")
+    return EXTRACTORS[layout]
+
+def normalize_date(value, input_format = '%d.%m.%Y'):
+    """
+    Converts a date string from input_format to the format YYYY-MM-DD.
+    """
+    return datetime.strptime(value, input_format).strftime('%Y-%m-%d')
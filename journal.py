@@ -0,0 +1,200 @@
+'''
+Write-ahead journal of the reports in flight, for resuming or rolling back reports which were left in import/tmp \
+when a process died during processing.
+'''
+from contextlib import contextmanager, nullcontext
+import os
+import time
+from uuid import uuid4
+from .sqlite_db import SqliteDatabase
+
+# Stages of a report in the journal, in processing order
+JOURNAL_STAGES = ["claimed", "parsed", "written"]
+
+def _read_boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+# Changes on every reboot, so entries of a previous boot are never mistaken for live processes
+_BOOT_ID = _read_boot_id()
+
+def _process_start_time(pid):
+    '''
+    Returns the start time of a process in clock ticks since boot, read from /proc/<pid>/stat, \
+    or None if the process does not exist or /proc is not available.
+    '''
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # the process name in parentheses may contain spaces, starttime is the 20th field after it
+    return int(stat.rsplit(")", 1)[1].split()[19])
+
+def _process_run_id(pid):
+    start_time = _process_start_time(pid)
+    return None if start_time is None else f"{_BOOT_ID}/{start_time}"
+
+# Run id of the current process by pid, so forked processes get their own, see _run_id
+_run_ids = {}
+
+def _run_id():
+    '''
+    Returns the run id of the current process: the boot id and the process start time, which together with \
+    the pid identify a process even when its pid is reused after it died, also after a reboot. \
+    Without /proc, a random run id is used instead.
+    '''
+    pid = os.getpid()
+    if pid not in _run_ids:
+        _run_ids[pid] = _process_run_id(pid) or uuid4().hex
+    return _run_ids[pid]
+
+def _is_alive(pid, run_id):
+    if pid == os.getpid():
+        return run_id == _run_id()
+    if os.path.isdir("/proc"):
+        return run_id == _process_run_id(pid)
+    # without /proc a reused pid can't be told apart, so only check that the pid exists
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class ProcessingJournal:
+    '''
+    Records the stage each report in flight has reached, keyed by its file name (which stays the same in \
+    import/new, import/tmp and import/imported), together with the new_filename of its outputs and the \
+    process handling it. Entries are removed once the report was moved to import/imported.
+    Each entry belongs to the process which created it (identified by pid and run id); other processes \
+    neither replace nor remove it while that process is alive.
+
+    Stages:
+        - claimed: the report is being moved (or was moved) to import/tmp. With deduplication, its new_filename \
+          is recorded once it was reserved in the dedupe index.
+        - parsed: its outputs are being written under new_filename.
+        - written: all outputs are complete, only the move to import/imported is missing.
+    '''
+    enabled = True
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SqliteDatabase(path, [
+            "CREATE TABLE IF NOT EXISTS entries (filename TEXT PRIMARY KEY, stage TEXT NOT NULL, new_filename TEXT, "
+            "pid INTEGER NOT NULL, run_id TEXT NOT NULL, updated_at REAL NOT NULL)"
+        ])
+
+    def begin(self, filename):
+        '''
+        Journals the claim of a report. Must be called before the report is moved to import/tmp. \
+        Returns False, without changing the journal, if a live process already holds an entry for the file name.
+        '''
+        owner = (os.getpid(), _run_id())
+        with self.db.lock:
+            connection = self.db.connect()
+            with connection:
+                # the insert takes the write lock, so checking and replacing can't interleave with other processes
+                if connection.execute(
+                    "INSERT OR IGNORE INTO entries VALUES (?, 'claimed', NULL, ?, ?, ?)", (filename, *owner, time.time())
+                ).rowcount:
+                    return True
+                pid, run_id = connection.execute("SELECT pid, run_id FROM entries WHERE filename = ?", (filename,)).fetchone()
+                if _is_alive(pid, run_id):
+                    return False
+                connection.execute(
+                    "UPDATE entries SET stage = 'claimed', new_filename = NULL, pid = ?, run_id = ?, updated_at = ? "
+                    "WHERE filename = ?",
+                    (*owner, time.time(), filename)
+                )
+                return True
+
+    def update(self, filename, stage, new_filename = None):
+        self.db.execute(
+            "UPDATE entries SET stage = ?, new_filename = COALESCE(?, new_filename), updated_at = ? "
+            "WHERE filename = ? AND pid = ? AND run_id = ?",
+            (stage, new_filename, time.time(), filename, os.getpid(), _run_id())
+        )
+
+    def finish(self, filename):
+        '''
+        Removes the entry of a report, if it belongs to the current process.
+        '''
+        self.db.execute(
+            "DELETE FROM entries WHERE filename = ? AND pid = ? AND run_id = ?", (filename, os.getpid(), _run_id())
+        )
+
+    @contextmanager
+    def finish_on_error(self, filename):
+        '''
+        Removes the entry if the wrapped processing raises, so a report which failed (rather than crashed) \
+        stays in import/tmp as without the journal, instead of being retried on every start.
+        '''
+        try:
+            yield
+        except Exception:
+            self.finish(filename)
+            raise
+
+    def unfinished(self):
+        '''
+        Returns the entries of the reports whose process is no longer running, as dictionaries with \
+        the keys filename, stage, new_filename, pid and run_id.
+        '''
+        rows = self.db.execute("SELECT filename, stage, new_filename, pid, run_id FROM entries ORDER BY updated_at")
+        return [
+            {"filename": filename, "stage": stage, "new_filename": new_filename, "pid": pid, "run_id": run_id}
+            for filename, stage, new_filename, pid, run_id in rows
+            if not _is_alive(pid, run_id)
+        ]
+
+    def adopt(self, entry):
+        '''
+        Takes over an entry returned by unfinished(), so the current process can recover the report and finish it. \
+        Returns False if another process took it over first.
+        '''
+        with self.db.lock:
+            connection = self.db.connect()
+            with connection:
+                return connection.execute(
+                    "UPDATE entries SET pid = ?, run_id = ?, updated_at = ? WHERE filename = ? AND pid = ? AND run_id = ?",
+                    (os.getpid(), _run_id(), time.time(), entry["filename"], entry["pid"], entry["run_id"])
+                ).rowcount == 1
+
+    def close(self):
+        self.db.close()
+
+class NullJournal:
+    '''
+    Journal used when journaling is disabled. All methods are no-ops.
+    '''
+    enabled = False
+
+    _context = nullcontext()
+
+    def begin(self, filename):
+        return True
+
+    def update(self, filename, stage, new_filename = None):
+        pass
+
+    def finish(self, filename):
+        pass
+
+    def finish_on_error(self, filename):
+        return self._context
+
+    def unfinished(self):
+        return []
+
+    def adopt(self, entry):
+        return True
+
+    def close(self):
+        pass
+
+NULL_JOURNAL = NullJournal()
@@ -0,0 +1,126 @@
+'''
+SQLite index of the report metadata in working/index.sqlite, to look up reports by casenumber, examination date, \
+endoscope or examiner without reading every metadata record.
+'''
+import json
+from .sqlite_db import SqliteDatabase
+
+# Columns of the index, filled from the report metadata. The full metadata is kept in the meta column.
+INDEX_COLUMNS = [
+    "new_filename", "original_filename", "casenumber", "first_name", "last_name", "birthdate", "gender",
+    "endoscope", "examiner_first_name", "examiner_last_name", "examination_date", "examination_time",
+]
+
+# Columns with an index for fast lookups
+INDEXED_COLUMNS = ["original_filename", "casenumber", "endoscope", "examiner_last_name", "examination_date"]
+
+class MetadataIndex:
+    '''
+    Keeps one row per report with the fields of extract_report_meta and offers a small query API.
+
+    Methods:
+        add: Adds or replaces the metadata of a report.
+        add_many: Adds or replaces the metadata of several reports in a single transaction.
+        remove: Removes a report by its new_filename.
+        get: Returns the metadata of a report by its new_filename.
+        query: Returns the metadata of all reports matching the given field values and date range.
+        count: Returns the number of indexed reports.
+        rebuild: Replaces the whole index, e.g. with the records of a metadata sink.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SqliteDatabase(path, [
+            "CREATE TABLE IF NOT EXISTS reports ("
+            + ", ".join(
+                f"{column} TEXT PRIMARY KEY" if column == "new_filename" else f"{column} TEXT"
+                for column in INDEX_COLUMNS
+            )
+            + ", meta TEXT NOT NULL)"
+        ] + [
+            f"CREATE INDEX IF NOT EXISTS reports_{column} ON reports ({column})" for column in INDEXED_COLUMNS
+        ])
+
+    @staticmethod
+    def _row(report_meta):
+        return [report_meta.get(column) for column in INDEX_COLUMNS] + [json.dumps(report_meta, ensure_ascii=False)]
+
+    def add(self, report_meta):
+        self.add_many([report_meta])
+
+    def add_many(self, reports_meta):
+        self.db.executemany(
+            f"INSERT OR REPLACE INTO reports ({', '.join(INDEX_COLUMNS)}, meta) "
+            f"VALUES ({', '.join('?' * (len(INDEX_COLUMNS) + 1))})",
+            [self._row(report_meta) for report_meta in reports_meta]
+        )
+
+    def remove(self, new_filename):
+        self.db.execute("DELETE FROM reports WHERE new_filename = ?", (new_filename,))
+
+    def get(self, new_filename):
+        '''
+        Returns the metadata of the report with the given new_filename, None if it is not indexed.
+        '''
+        rows = self.db.execute("SELECT meta FROM reports WHERE new_filename = ?", (new_filename,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def query(self, examination_date_from = None, examination_date_to = None, limit = None, **fields):
+        '''
+        Returns the metadata of all reports whose fields equal the given values, optionally restricted \
+        to an examination date range. Results are ordered by examination date and time.
+        Args:
+            examination_date_from (str, optional): First examination date (YYYY-MM-DD) to include.
+            examination_date_to (str, optional): Last examination date (YYYY-MM-DD) to include.
+            limit (int, optional): Maximum number of results.
+            **fields: Column values to match exactly, e.g. casenumber="0015744097" or endoscope="GIF-HQ190".
+
+        Returns:
+            List[dict]: The metadata of the matching reports.
+        '''
+        unknown = set(fields) - set(INDEX_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown index fields {sorted(unknown)}, expected some of {INDEX_COLUMNS}.")
+
+        conditions = [f"{column} = ?" for column in fields]
+        parameters = list(fields.values())
+        if examination_date_from is not None:
+            conditions.append("examination_date >= ?")
+            parameters.append(examination_date_from)
+        if examination_date_to is not None:
+            conditions.append("examination_date <= ?")
+            parameters.append(examination_date_to)
+
+        sql = "SELECT meta FROM reports"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY examination_date, examination_time, new_filename"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [json.loads(meta) for meta, in self.db.execute(sql, parameters)]
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM reports")[0][0]
+
+    def rebuild(self, reports_meta, batch_size = 1000):
+        '''
+        Clears the index and adds the given metadata records, e.g. MetadataSink.iter_metadata().
+        Returns the number of indexed reports.
+        '''
+        self.db.execute("DELETE FROM reports")
+        count = 0
+        batch = []
+        for report_meta in reports_meta:
+            batch.append(report_meta)
+            if len(batch) >= batch_size:
+                self.add_many(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.add_many(batch)
+            count += len(batch)
+        return count
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,244 @@
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+import time
+from .utils import write_text_atomic
+
+class MetadataSink(ABC):
+    '''
+    Base class of the output sinks for report metadata. A sink receives the metadata dictionary of every \
+    processed report via write(), may buffer them until flush() and can read all written metadata back.
+    '''
+
+    @abstractmethod
+    def write(self, report_meta):
+        '''
+        Writes the metadata of a report, or buffers it until the next flush().
+        '''
+
+    @abstractmethod
+    def iter_metadata(self, errors = None):
+        '''
+        Yields the metadata dictionaries of all written reports, one at a time.
+        If errors is a dictionary, unreadable records are skipped and their error message is stored in it, \
+        keyed by the record's new_filename (or location, if the sink can't tell); otherwise the error is raised.
+        '''
+
+    @staticmethod
+    def _record_error(errors, key, error):
+        if errors is None:
+            raise error
+        errors[key] = f"{type(error).__name__}: {error}"
+
+    def delete(self, new_filename):
+        '''
+        Removes the metadata of a report if the sink supports it. Returns whether it was removed; \
+        append-only sinks return False.
+        '''
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class JsonFileMetadataSink(MetadataSink):
+    '''
+    Writes the metadata of each report to its own file, <directory>/<new_filename>.json (the default layout). \
+    With atomic, the file is written to a temporary file which then replaces the target.
+    '''
+
+    def __init__(self, directory, atomic = False):
+        self.directory = directory
+        self.atomic = atomic
+
+    def _path(self, new_filename):
+        return os.path.join(self.directory, new_filename + ".json")
+
+    def write(self, report_meta):
+        if self.atomic:
+            write_text_atomic(self._path(report_meta["new_filename"]), json.dumps(report_meta))
+            return
+        with open(self._path(report_meta["new_filename"]), "w", encoding="utf-8") as f:
+            json.dump(report_meta, f)
+
+    def delete(self, new_filename):
+        try:
+            os.remove(self._path(new_filename))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def iter_metadata(self, errors = None):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        report_meta = json.load(f)
+                except (OSError, ValueError) as e:
+                    self._record_error(errors, entry.name[:-len(".json")], e)
+                    continue
+                yield report_meta
+
+class JsonlMetadataSink(MetadataSink):
+    '''
+    Appends the metadata of all reports as JSON lines to a single file. Records are buffered and appended \
+    in batches of batch_size with a single write call, so several processes can append to the same file. \
+    A timer appends and fsyncs the buffered records at the latest fsync_interval seconds after they were \
+    written, also when the batch is not full; close() does so immediately.
+
+    Reports are moved to import/imported before their record is on disk, so a crashed process loses \
+    the records of up to fsync_interval seconds. With the journal enabled, the sink is flushed before \
+    a report counts as written.
+    '''
+
+    def __init__(self, path, batch_size = 100, fsync_interval = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self._buffer = []
+        # whether records were appended since the last fsync
+        self._unsynced = False
+        self._lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._timer = None
+
+    def write(self, report_meta):
+        with self._lock:
+            self._buffer.append(json.dumps(report_meta, ensure_ascii=False) + "\n")
+            if len(self._buffer) >= self.batch_size:
+                self._flush(fsync = time.monotonic() - self._last_fsync >= self.fsync_interval)
+            self._schedule_fsync()
+
+    def _schedule_fsync(self):
+        # called with the lock held
+        if self._timer is None and (self._buffer or self._unsynced):
+            delay = max(0.0, self._last_fsync + self.fsync_interval - time.monotonic())
+            self._timer = threading.Timer(delay, self._fsync_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _fsync_on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._flush(fsync = True)
+
+    def _flush(self, fsync):
+        if not self._buffer and not (fsync and self._unsynced):
+            return
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if self._buffer:
+                os.write(fd, "".join(self._buffer).encode("utf-8"))
+                self._buffer = []
+                self._unsynced = True
+            if fsync:
+                os.fsync(fd)
+                self._unsynced = False
+                self._last_fsync = time.monotonic()
+        finally:
+            os.close(fd)
+
+    def flush(self):
+        with self._lock:
+            self._flush(fsync = time.monotonic() - self._last_fsync >= self.fsync_interval)
+            self._schedule_fsync()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flush(fsync = True)
+
+    def iter_metadata(self, errors = None):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    report_meta = json.loads(line)
+                except ValueError as e:
+                    self._record_error(errors, f"{os.path.basename(self.path)}:{line_number}", e)
+                    continue
+                yield report_meta
+
+class ParquetMetadataSink(MetadataSink):
+    '''
+    Writes the metadata of all reports as columnar Parquet files. Records are buffered and each batch of \
+    batch_size records is written to a new part file <directory>/metadata-<timestamp>-<pid>-<n>.parquet. \
+    Requires the optional pyarrow package.
+    '''
+
+    def __init__(self, directory, batch_size = 1000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("The parquet metadata sink requires pyarrow (pip install pyarrow).") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.directory = directory
+        self.batch_size = batch_size
+        self._buffer = []
+        self._parts = 0
+        self._lock = threading.Lock()
+
+    def write(self, report_meta):
+        with self._lock:
+            self._buffer.append(report_meta)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = list(dict.fromkeys(key for record in self._buffer for key in record))
+        table = self._pa.Table.from_pylist(
+            [{column: record.get(column) for column in columns} for record in self._buffer]
+        )
+        path = os.path.join(
+            self.directory, f"metadata-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{self._parts}.parquet"
+        )
+        tmp_path = path + ".tmp"
+        self._pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        self._parts += 1
+        self._buffer = []
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def iter_metadata(self, errors = None):
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if entry.name.endswith(".parquet"):
+                try:
+                    records = self._pq.read_table(entry.path).to_pylist()
+                except (OSError, self._pa.ArrowException) as e:
+                    self._record_error(errors, entry.name, e)
+                    continue
+                for record in records:
+                    yield {key: value for key, value in record.items() if value is not None}
+
+# Metadata sinks selectable by name, see create_metadata_sink
+METADATA_SINKS = ["json", "jsonl", "parquet"]
+
+def create_metadata_sink(kind, metadata_dir, atomic = False):
+    '''
+    Creates the metadata sink of the given kind writing into metadata_dir:
+        - "json": one <new_filename>.json per report (default), written atomically if atomic is set.
+        - "jsonl": batched appends to metadata.jsonl with periodic fsync.
+        - "parquet": Parquet part files (requires pyarrow).
+    '''
+    if kind == "json":
+        return JsonFileMetadataSink(metadata_dir, atomic = atomic)
+    if kind == "jsonl":
+        return JsonlMetadataSink(os.path.join(metadata_dir, "metadata.jsonl"))
+    if kind == "parquet":
+        return ParquetMetadataSink(metadata_dir)
+    raise ValueError(f"Unknown metadata sink '{kind}', expected one of {METADATA_SINKS}.")
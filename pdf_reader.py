@@ -0,0 +1,353 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import islice
+import io
+import mmap
+import os
+
+class BufferReader(io.RawIOBase):
+    '''
+    Read-only, seekable binary stream over an object supporting the buffer protocol (bytearray, memoryview, \
+    mmap, array, ...) which copies only the ranges that are read, so large buffers are not duplicated in memory. \
+    Positions and sizes count bytes, whatever the item size of the buffer. Unlike a bare mmap it is an \
+    io.IOBase and its seek returns the new position, as the text backends expect. close() releases the \
+    buffer, so e.g. an mmap can be closed afterwards.
+    '''
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._buffer[self._position:self._position + len(b)]
+        b[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence = io.SEEK_SET):
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._buffer)}[whence]
+        self._position = max(0, start + offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            self._buffer.release()
+        super().close()
+
+def as_pdf_source(source):
+    '''
+    Normalizes the ways a PDF can be passed for reading: a path (str or os.PathLike), the PDF's bytes \
+    (bytes are wrapped in io.BytesIO, which does not copy them; mmap and other buffers such as bytearray, \
+    memoryview or array in a BufferReader) or a seekable binary file-like object such as an open file, \
+    which is used as is. See pdf_source for closing the created stream.
+
+    Args:
+        source: The PDF.
+
+    Returns:
+        str or file-like: A path or a seekable binary stream all text backends can open.
+    '''
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, mmap.mmap):
+        return BufferReader(source)
+    if hasattr(source, "read") and hasattr(source, "seek"):
+        return source
+    try:
+        return BufferReader(source)
+    except TypeError:
+        raise TypeError(
+            f"Cannot read a PDF from {type(source).__name__}, expected a path, bytes or a binary file-like object."
+        ) from None
+
+@contextmanager
+def pdf_source(source):
+    '''
+    Context manager around as_pdf_source which closes the stream it created for the source on exit, \
+    releasing the source's buffer. Streams passed in are left open.
+    '''
+    normalized = as_pdf_source(source)
+    try:
+        yield normalized
+    finally:
+        if normalized is not source and not isinstance(normalized, str):
+            normalized.close()
+
+def open_pdf(pdf_path):
+    '''
+    Opens a PDF with pdfplumber. pdfplumber (and with it pdfminer) is only imported on first use, \
+    so importing this module stays cheap.
+
+    Args:
+        pdf_path (str): The path to the PDF file to be opened.
+
+    Returns:
+        pdfplumber.PDF: The opened PDF, to be used as a context manager.
+    '''
+    import pdfplumber
+    return pdfplumber.open(pdf_path)
+
+def iter_page_texts(pdf, max_pages = None, first_page = 0):
+    '''
+    Yields the text of each page of an opened pdfplumber PDF, one page at a time.
+    After a page's text has been extracted, its cached layout objects (chars, lines, images, ...) are
+    released, so memory does not grow with the page count. Pages without text yield an empty string.
+
+    Args:
+        pdf (pdfplumber.PDF): The opened PDF.
+        max_pages (int, optional): Only yield max_pages pages. Default is None (all pages).
+        first_page (int, optional): Index of the first page to yield. Default is 0.
+
+    Yields:
+        str: Text content of the next page.
+    '''
+    stop = None if max_pages is None else first_page + max_pages
+    for page in islice(pdf.pages, first_page, stop):
+        text = page.extract_text() or ""
+
+        release = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+        if release:
+            release()
+
+        yield text
+
+def _normalize_page_text(text):
+    # other backends end lines with \r\n or end each text block with a newline, pdfplumber does neither
+    return text.replace("\r\n", "\n").replace("\r", "\n").rstrip("\n")
+
+class PdfTextBackend(ABC):
+    '''
+    Base class of the text extraction backends. A backend opens a PDF (a path or a binary file-like object) \
+    as a document, counts its pages and yields the plain text of a page range with lines separated by "\\n". \
+    Backends import their library on first use.
+    '''
+    name = None
+
+    @abstractmethod
+    def open(self, source):
+        '''
+        Returns the opened document, to be used as a context manager.
+        '''
+
+    @abstractmethod
+    def page_count(self, document):
+        '''
+        Returns the number of pages of an opened document.
+        '''
+
+    @abstractmethod
+    def iter_page_texts(self, document, max_pages = None, first_page = 0):
+        '''
+        Yields the text of max_pages pages (all if None) of an opened document, starting at first_page.
+        '''
+
+    def _page_stop(self, document, max_pages, first_page):
+        page_count = self.page_count(document)
+        return page_count if max_pages is None else min(page_count, first_page + max_pages)
+
+class PdfplumberBackend(PdfTextBackend):
+    '''
+    pdfplumber's character-level layout analysis (the default).
+    '''
+    name = "pdfplumber"
+
+    def open(self, source):
+        return open_pdf(source)
+
+    def page_count(self, document):
+        return len(document.pages)
+
+    def iter_page_texts(self, document, max_pages = None, first_page = 0):
+        return iter_page_texts(document, max_pages = max_pages, first_page = first_page)
+
+class PdfminerBackend(PdfTextBackend):
+    '''
+    pdfminer.six's text boxes, without pdfplumber's per-character processing on top.
+    '''
+    name = "pdfminer"
+
+    @contextmanager
+    def open(self, source):
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                yield f
+        else:
+            yield source
+
+    def page_count(self, document):
+        from pdfminer.pdfpage import PDFPage
+        document.seek(0)
+        return sum(1 for _ in PDFPage.get_pages(document))
+
+    def iter_page_texts(self, document, max_pages = None, first_page = 0):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams, LTTextContainer
+        page_numbers = None
+        if first_page or max_pages is not None:
+            page_numbers = set(range(first_page, self._page_stop(document, max_pages, first_page)))
+        document.seek(0)
+        for page in extract_pages(document, page_numbers = page_numbers, laparams = LAParams()):
+            yield _normalize_page_text(
+                "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+            )
+
+class PypdfBackend(PdfTextBackend):
+    '''
+    pypdf's pure-Python text extraction. Requires the optional pypdf package.
+    '''
+    name = "pypdf"
+
+    @contextmanager
+    def open(self, source):
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ImportError("The pypdf text backend requires pypdf (pip install pypdf).") from e
+        reader = PdfReader(source)
+        try:
+            yield reader
+        finally:
+            reader.close()
+
+    def page_count(self, document):
+        return len(document.pages)
+
+    def iter_page_texts(self, document, max_pages = None, first_page = 0):
+        for i in range(first_page, self._page_stop(document, max_pages, first_page)):
+            yield _normalize_page_text(document.pages[i].extract_text() or "")
+
+class PdfiumBackend(PdfTextBackend):
+    '''
+    PDFium's native text extraction via pypdfium2, which pdfplumber already depends on.
+    '''
+    name = "pdfium"
+
+    @contextmanager
+    def open(self, source):
+        import pypdfium2
+        document = pypdfium2.PdfDocument(source)
+        try:
+            yield document
+        finally:
+            document.close()
+
+    def page_count(self, document):
+        return len(document)
+
+    def iter_page_texts(self, document, max_pages = None, first_page = 0):
+        for i in range(first_page, self._page_stop(document, max_pages, first_page)):
+            page = document[i]
+            text_page = page.get_textpage()
+            try:
+                yield _normalize_page_text(text_page.get_text_range())
+            finally:
+                text_page.close()
+                page.close()
+
+# Text backends selectable by name, see get_text_backend
+TEXT_BACKENDS = {backend.name: backend for backend in [PdfplumberBackend(), PdfminerBackend(), PypdfBackend(), PdfiumBackend()]}
+
+def get_text_backend(name):
+    '''
+    Returns the text backend with the given name: "pdfplumber" (default), "pdfminer", "pypdf" or "pdfium".
+    '''
+    try:
+        return TEXT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown text backend '{name}', expected one of {list(TEXT_BACKENDS)}.") from None
+
+
+def page_ranges(page_count, chunks):
+    '''
+    Splits the pages of a document into at most chunks contiguous (start, stop) ranges of nearly equal size.
+    '''
+    chunks = max(1, min(chunks, page_count))
+    size, remainder = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def read_pdf_page_range(pdf_path, start, stop, backend = "pdfplumber"):
+    '''
+    Opens a PDF and returns the joined text of its pages start to stop (exclusive). Runs in the worker \
+    processes of the chunked path of read_pdf_text.
+    '''
+    text_backend = get_text_backend(backend)
+    with text_backend.open(pdf_path) as document:
+        return "".join(text_backend.iter_page_texts(document, max_pages = stop - start, first_page = start))
+
+def read_pdf_text(pdf_path, executor = None, min_pages = None, chunks = 1, backend = "pdfplumber"):
+    '''
+    Reads a PDF page by page and joins the page texts once.
+    With an executor, PDFs with at least min_pages pages are split into chunks contiguous page ranges, \
+    each read by a worker which opens the file itself, and the texts are stitched back in page order. \
+    Smaller PDFs (and file-like sources, which can't be reopened by a worker) are read serially.
+
+    Args:
+        pdf_path (str): The path to the PDF file to be read.
+        executor (concurrent.futures.Executor, optional): Process pool for the chunked path. Default is None (always serial).
+        min_pages (int, optional): Page count from which the chunked path is used.
+        chunks (int, optional): Number of page ranges of the chunked path, usually the number of pool workers.
+        backend (str, optional): Name of the text backend, see get_text_backend. Default is "pdfplumber".
+
+    Returns:
+        str: Extracted raw text content of all pages.
+    '''
+    text_backend = get_text_backend(backend)
+    with text_backend.open(pdf_path) as document:
+        if executor is None or not isinstance(pdf_path, str) or chunks < 2:
+            return "".join(text_backend.iter_page_texts(document))
+        page_count = text_backend.page_count(document)
+        if page_count < min_pages:
+            return "".join(text_backend.iter_page_texts(document))
+
+    futures = [
+        executor.submit(read_pdf_page_range, pdf_path, start, stop, backend)
+        for start, stop in page_ranges(page_count, chunks)
+    ]
+    return "".join(future.result() for future in futures)
+
+
+def read_pdf_header(pdf_path, flags, max_pages = 1, max_lines = None, backend = "pdfplumber"):
+    '''
+    Reads only the header of a PDF: the lines of the first max_pages pages, stopping early once a line
+    starting with each of the given flags has been found or max_lines lines have been read.
+    Pages after the header are never laid out.
+
+    Args:
+        pdf_path (str): The path to the PDF file to be read.
+        flags (List[str]): Line flags which mark the end of the header once all of them were found.
+        max_pages (int, optional): Maximum number of pages to read. Default is 1.
+        max_lines (int, optional): Maximum number of lines to read. Default is None (no limit).
+        backend (str, optional): Name of the text backend, see get_text_backend. Default is "pdfplumber".
+
+    Returns:
+        str: The header lines joined by newlines.
+    '''
+    missing_flags = set(flags)
+    lines = []
+    text_backend = get_text_backend(backend)
+    with text_backend.open(pdf_path) as document:
+        for page_text in text_backend.iter_page_texts(document, max_pages = max_pages):
+            for line in page_text.split("\n"):
+                lines.append(line)
+                missing_flags = {flag for flag in missing_flags if not line.startswith(flag)}
+                if not missing_flags or (max_lines and len(lines) >= max_lines):
+                    return "\n".join(lines)
+
+    return "\n".join(lines)
@@ -1,18 +1,69 @@
 from .settings import DEFAULT_SETTINGS
-from faker import Faker
-import gender_guesser.detector as gender_detector
 from typing import List
 import os
 
-import pdfplumber
 from uuid import uuid4
+from datetime import datetime
+import hashlib
 import json
+import time
 import os
-from .anonymization import anonymize_report
+from .anonymization import anonymize_report, FakerPool, EmployeeNameMatcher
 from .extraction import extract_report_meta
+from .pdf_reader import get_text_backend, pdf_source, read_pdf_text, read_pdf_header
+from .dedupe import DedupeIndex, header_key
+from .journal import ProcessingJournal, NULL_JOURNAL
+from .metadata_index import MetadataIndex
+from .metadata_sinks import create_metadata_sink
+from .text_cache import TextCache
+from .text_store import create_text_store
+from .timing import StageTimer, NULL_TIMER
+from .utils import get_gender_detector, hash_file, hash_stream
+from .watch import InboxWatcher
 import warnings
 
 
+# ReportReader instance of the current pool worker process, see _init_worker
+_worker_reader = None
+
+def _init_worker(reader_kwargs):
+    '''
+    Initializer for pool worker processes. Builds one ReportReader (and with it one Faker and
+    one gender detector) per worker process, which is then reused for every report the worker handles.
+    '''
+    from multiprocessing.util import Finalize
+    global _worker_reader
+    FakerPool.reseed()
+    # long PDFs are read serially inside pool workers, the pool already keeps all CPUs busy
+    _worker_reader = ReportReader(**{**reader_kwargs, "page_workers": 0})
+    # flush buffered outputs (e.g. of the metadata sink) when the worker process exits
+    Finalize(None, _worker_reader.close, exitpriority = 10)
+
+def _process_report_in_worker(pdf_path, verbose, timings):
+    '''
+    Processes a single report with the ReportReader of the current worker process.
+
+    Returns:
+        tuple: Boolean indicating success, the extracted metadata and the stage durations (None if timings
+        is False). The anonymized text is not sent back to the parent process since it is already written to disk.
+    '''
+    timer = StageTimer() if timings else None
+    success, _, report_meta = _worker_reader.process_report(pdf_path, verbose = verbose, timer = timer)
+    return success, report_meta, timer.durations if timer else None
+
+def _parse_report_in_worker(pdf_path, data, new_filename = None):
+    '''
+    Reads, extracts and anonymizes a single report from its bytes with the ReportReader of the current worker process.
+    '''
+    return _worker_reader.parse_report(pdf_path, data = data, new_filename = new_filename)
+
+def _reanonymize_report_in_worker(report_meta, previous_fingerprint):
+    '''
+    Re-anonymizes a single report with the ReportReader of the current worker process.
+    '''
+    return _worker_reader.reanonymize_report(report_meta, previous_fingerprint)
+
+
 class ReportReader:
     '''
     The ReportReader class handles the processing and management of PDF medical reports.
@@ -25,18 +76,47 @@ class ReportReader:
         employee_first_names (List[str]): List of first names of employees used for anonymization.
         employee_last_names (List[str]): List of last names of employees used for anonymization.
         flags (List[str]): Flags that guide various processing steps.
-        fake (Faker): Instance of Faker for data anonymization.
-        gender_detector (gender_detector.Detector): Detector for guessing gender based on names.
+        layout (str): Report layout whose registered field extractors are used for metadata extraction.
+        header_flags (List[str]): Line flags of the report header, used to stop header reading early.
+        page_workers (int): Number of processes reading page ranges of long PDFs in parallel, 0 if disabled.
+        page_chunk_min_pages (int): Page count from which a PDF is read in parallel page ranges.
+        text_backend (str): Name of the backend extracting the text of PDFs, see pdf_reader.get_text_backend.
+        fake_pool (FakerPool): Source of fake names and dates, reused for every report.
+        fake (Faker): Instance of Faker for data anonymization, shared with fake_pool and built on first use.
+        name_matcher (EmployeeNameMatcher): Compiled matcher replacing employee names in a single scan.
+        gender_detector (gender_guesser.detector.Detector): Shared detector for guessing gender based on names, built on first use.
+        text_cache (TextCache): Cache of extracted PDF texts keyed by the text backend and the PDF's SHA-256, None if disabled.
+        metadata_sink (MetadataSink): Output sink receiving the metadata of each processed report.
+        text_store (TextStore): Storage of the raw and anonymized texts.
+        metadata_index (MetadataIndex): SQLite index of the report metadata, None if disabled.
+        dedupe_index (DedupeIndex): Index of the file hashes and header keys of imported reports, None if deduplication is disabled.
+        journal (ProcessingJournal): Journal of the reports in flight, NULL_JOURNAL if disabled.
         
     Methods:
+        close: Flushes and closes buffering outputs.
+        recover_journal: Resumes or rolls back the reports left in flight by a crashed process.
         check_folder_integrity: Ensures that the necessary folders and subfolders exist for report processing.
         get_new_reports: Fetches new reports from the designated directory.
         read_pdf: Extracts text content from a PDF file.
+        read_pdf_header: Extracts only the header lines of a PDF file.
+        read_report_text: Extracts text content from a PDF file, using the text cache if enabled.
         move_report_to_in_progress: Moves a report to an 'in progress' directory.
         move_report_to_imported: Moves a processed report to the 'imported' directory.
         extract_report_meta: Extracts metadata from a report.
+        extract_report_meta_from_header: Extracts metadata from a PDF file's header without reading the full document.
         process_report: Processes a single report - from reading to anonymization.
-        process_new_reports: Processes all new reports found in the designated directory.
+        claim_and_read_report: Moves a report to the 'in progress' directory and reads its bytes.
+        parse_report: Reads, extracts and anonymizes a report without writing anything.
+        write_report_outputs: Saves the raw, metadata and anonymized outputs and moves the report to 'imported'.
+        process_reports: Processes the given reports, optionally in a process pool.
+        process_new_reports: Processes all new reports found in the designated directory, optionally in a process pool.
+        watch: Watches the designated directory and processes new reports in micro-batches as they arrive.
+        run_pipeline: Processes reports in an asyncio pipeline overlapping disk I/O with parsing in a process pool.
+        anonymize_text: Anonymizes the raw text of a report using its metadata.
+        reanonymize_report: Anonymizes a report again from its raw text and metadata in the working directory.
+        reanonymize_all: Re-anonymizes all reports whose raw text, metadata or settings changed, optionally in a process pool.
+        query_reports: Looks up the metadata of reports in the metadata index.
+        rebuild_metadata_index: Rebuilds the metadata index from the metadata sink.
     '''
 
     def __init__(
@@ -51,6 +131,32 @@ class ReportReader:
             employee_last_names:List[str] = DEFAULT_SETTINGS["last_names"],
             #Flags that guide various processing steps.
             flags:List[str] = DEFAULT_SETTINGS["flags"],
+            #Report layout whose registered field extractors are used for metadata extraction.
+            layout:str = DEFAULT_SETTINGS["layout"],
+            #Number of fake names and dates pre-generated per buffer refill (0 disables buffering).
+            fake_buffer_size:int = DEFAULT_SETTINGS["fake_buffer_size"],
+            #Cache extracted PDF texts in working/text_cache, keyed by the text backend and the SHA-256 of the PDF bytes.
+            text_cache:bool = False,
+            #Maximum total size of the text cache in bytes.
+            text_cache_max_bytes:int = DEFAULT_SETTINGS["text_cache_max_bytes"],
+            #Maximum age of a text cache entry in seconds.
+            text_cache_max_age:float = DEFAULT_SETTINGS["text_cache_max_age"],
+            #Output sink for report metadata: "json" (one file per report), "jsonl" or "parquet".
+            metadata_sink:str = DEFAULT_SETTINGS["metadata_sink"],
+            #Storage of the raw and anonymized texts: "files" (one .txt per text) or "sqlite" (packed in working/texts.sqlite).
+            text_store:str = DEFAULT_SETTINGS["text_store"],
+            #Maintain a queryable SQLite index of the report metadata in working/index.sqlite.
+            metadata_index:bool = DEFAULT_SETTINGS["metadata_index"],
+            #Detect already imported reports by file hash and header key before reading them.
+            deduplicate:bool = DEFAULT_SETTINGS["deduplicate"],
+            #Journal the stages of each report and write outputs atomically, to recover from crashes on start-up.
+            journal:bool = DEFAULT_SETTINGS["journal"],
+            #Number of processes reading the page ranges of long PDFs in parallel (0 disables chunked reading).
+            page_workers:int = DEFAULT_SETTINGS["page_workers"],
+            #Page count from which a PDF is read in parallel page ranges.
+            page_chunk_min_pages:int = DEFAULT_SETTINGS["page_chunk_min_pages"],
+            #Library extracting the text of PDFs: "pdfplumber", "pdfminer", "pypdf" or "pdfium".
+            text_backend:str = DEFAULT_SETTINGS["text_backend"],
     ):
         self.report_root_path = report_root_path
 
@@ -58,10 +164,149 @@ class ReportReader:
         self.employee_first_names = employee_first_names
         self.employee_last_names = employee_last_names
         self.flags = flags
-        self.fake = Faker(locale=locale)
-        self.gender_detector = gender_detector.Detector(case_sensitive = True)
+        self.layout = layout
+        self.header_flags = [flag for flag in flags.values() if isinstance(flag, str)]
+        self.page_workers = page_workers
+        self.page_chunk_min_pages = page_chunk_min_pages
+        self._page_executor = None
+        get_text_backend(text_backend) # fail early on unknown backends
+        self.text_backend = text_backend
+        self.fake_pool = FakerPool(locale, buffer_size = fake_buffer_size)
+        self.name_matcher = EmployeeNameMatcher(employee_first_names, employee_last_names)
         self.check_folder_integrity()
 
+        if text_cache:
+            self.text_cache = TextCache(self.text_cache_dir, text_cache_max_bytes, text_cache_max_age)
+        else:
+            self.text_cache = None
+
+        self.metadata_sink_kind = metadata_sink
+        self.metadata_sink = create_metadata_sink(
+            metadata_sink, os.path.join(self.report_root_path, "working/metadata/"), atomic = journal
+        )
+        self.text_store_kind = text_store
+        self.text_store = create_text_store(text_store, os.path.join(self.report_root_path, "working"), atomic = journal)
+        if metadata_index:
+            self.metadata_index = MetadataIndex(os.path.join(self.report_root_path, "working/index.sqlite"))
+        else:
+            self.metadata_index = None
+        if deduplicate:
+            self.dedupe_index = DedupeIndex(os.path.join(self.report_root_path, "working/dedupe.sqlite"))
+        else:
+            self.dedupe_index = None
+        if journal:
+            self.journal = ProcessingJournal(os.path.join(self.report_root_path, "working/journal.sqlite"))
+            self.recover_journal()
+        else:
+            self.journal = NULL_JOURNAL
+
+    @property
+    def fake(self):
+        return self.fake_pool.fake
+
+    @property
+    def gender_detector(self):
+        return get_gender_detector()
+
+    def get_reader_kwargs(self):
+        '''
+        Returns the keyword arguments needed to build an equally configured ReportReader, \
+        e.g. inside a pool worker process.
+
+        Returns:
+            dict: Keyword arguments for ReportReader.__init__.
+        '''
+        return {
+            "report_root_path": self.report_root_path,
+            "locale": self.locale,
+            "employee_first_names": self.employee_first_names,
+            "employee_last_names": self.employee_last_names,
+            "flags": self.flags,
+            "layout": self.layout,
+            "fake_buffer_size": self.fake_pool.buffer_size,
+            "text_cache": self.text_cache is not None,
+            "text_cache_max_bytes": self.text_cache.max_bytes if self.text_cache else DEFAULT_SETTINGS["text_cache_max_bytes"],
+            "text_cache_max_age": self.text_cache.max_age if self.text_cache else DEFAULT_SETTINGS["text_cache_max_age"],
+            "metadata_sink": self.metadata_sink_kind,
+            "text_store": self.text_store_kind,
+            "metadata_index": self.metadata_index is not None,
+            "deduplicate": self.dedupe_index is not None,
+            "journal": self.journal.enabled,
+            "page_workers": self.page_workers,
+            "page_chunk_min_pages": self.page_chunk_min_pages,
+            "text_backend": self.text_backend,
+        }
+
+    def close(self):
+        '''
+        Flushes and closes the outputs which buffer data or hold connections, i.e. the metadata sink, \
+        the text store, the metadata index, the dedupe index and the journal, and shuts down the page reading pool.
+        '''
+        self.metadata_sink.close()
+        self.text_store.close()
+        if self.metadata_index:
+            self.metadata_index.close()
+        if self.dedupe_index:
+            self.dedupe_index.close()
+        self.journal.close()
+        if self._page_executor is not None:
+            self._page_executor.shutdown()
+            self._page_executor = None
+
+    def recover_journal(self, verbose = True):
+        '''
+        Recovers the reports which a crashed process left in the 'in progress' directory, using the journal. \
+        Reports whose outputs were completely written are moved on to the 'imported' directory. For all \
+        other reports, the partial outputs are removed and the report is moved back to the 'new reports' \
+        directory, so it is processed again. Reports of processes which are still running are not touched. \
+        Called on start-up if the journal is enabled.
+
+        Partial metadata can only be removed from the per-file json sink; the append-only jsonl and \
+        parquet sinks keep records of rolled back reports (they are flushed before a report counts as written).
+        Args:
+            verbose (bool, optional): Flag to control the display of recovery logs. Default is True.
+
+        Returns:
+            dict: Contains the keys
+                - 'resumed': List of the file names of the reports which were moved to 'imported'.
+                - 'rolled_back': List of the file names of the reports which were moved back to 'new reports'.
+        '''
+        results = {"resumed": [], "rolled_back": []}
+        for entry in self.journal.unfinished():
+            # another process may be recovering the same entry
+            if not self.journal.adopt(entry):
+                continue
+            filename = entry["filename"]
+            pdf_path = self.report_in_progress_dir + filename
+            if not os.path.exists(pdf_path):
+                # the claim never happened or the report was already moved on
+                self.journal.finish(filename)
+                continue
+
+            if entry["stage"] == "written":
+                self.move_report_to_imported(pdf_path)
+                results["resumed"].append(filename)
+                continue
+
+            new_filename = entry["new_filename"]
+            if new_filename:
+                self.text_store.delete("raw", self.text_store.raw_name(filename, new_filename))
+                self.text_store.delete("anonymized", new_filename)
+                self.metadata_sink.delete(new_filename)
+                if self.metadata_index:
+                    self.metadata_index.remove(new_filename)
+                if self.dedupe_index:
+                    self.dedupe_index.remove(new_filename)
+            os.rename(pdf_path, self.new_report_dir + filename)
+            self.journal.finish(filename)
+            results["rolled_back"].append(filename)
+
+        if verbose and (results["resumed"] or results["rolled_back"]):
+            print(
+                f"Recovered from the journal: resumed {len(results['resumed'])} reports, "
+                f"rolled back {len(results['rolled_back'])}."
+            )
+        return results
 
     def check_folder_integrity(self):
         '''
@@ -84,6 +329,10 @@ class ReportReader:
         self.raw_report_dir = os.path.join(self.report_root_path, "working/raw/")
         self.metadata_report_dir = os.path.join(self.report_root_path, "working/metadata/")
         self.anonymized_report_dir = os.path.join(self.report_root_path, "working/anonymized/")
+        # fingerprints of the inputs and settings each anonymized report was last written with
+        self.anonymization_fingerprints_path = os.path.join(self.report_root_path, "working/anonymized_fingerprints.json")
+        # only created if the text cache is enabled
+        self.text_cache_dir = os.path.join(self.report_root_path, "working/text_cache/")
 
         # make paths including parents if they don't exist yet
         os.makedirs(self.new_report_dir, exist_ok=True)
@@ -115,32 +364,86 @@ class ReportReader:
     
     def read_pdf(self, pdf_path):
         '''
-        Read pdf file using pdfplumber and return the raw text content.
+        Read pdf file using the text backend (pdfplumber by default) and return the raw text content.
+        Pages are streamed one at a time and their cached layout objects are released after use.
+        With page_workers, PDFs of at least page_chunk_min_pages pages are split into page ranges which \
+        are read in a process pool (started on first use) and stitched back in order.
         Args:
-            pdf_path (str): The path to the PDF file to be read.
+            pdf_path (str, bytes or file-like): The path to the PDF file to be read, or the PDF itself as bytes, \
+                bytearray, memoryview, mmap or seekable binary file-like object (see as_pdf_source).
             
         Returns:
             str: Extracted raw text content from the PDF. Returns an empty string if the extraction fails.
 
         '''
-        with pdfplumber.open(pdf_path) as pdf:
-            # get the text content of the pdf file
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text()
-            
-            
-            raw_text = text
+        with pdf_source(pdf_path) as source:
+            if self.page_workers and self.page_workers > 1:
+                if self._page_executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._page_executor = ProcessPoolExecutor(max_workers = self.page_workers)
+                text = read_pdf_text(
+                    source,
+                    executor = self._page_executor,
+                    min_pages = self.page_chunk_min_pages,
+                    chunks = self.page_workers,
+                    backend = self.text_backend
+                )
+            else:
+                text = read_pdf_text(source, backend = self.text_backend)
 
-        if not raw_text:
+        if not text:
             warnings.warn(f"Could not read text from {pdf_path}.")
             return text
         
         return text
     
+    def read_report_text(self, pdf_path, data = None):
+        '''
+        Returns the raw text content of a PDF. If the text cache is enabled, the text is looked up by the text \
+        backend and the SHA-256 of the PDF bytes first and only extracted (and then cached) on a miss.
+        Args:
+            pdf_path (str, bytes or file-like): The path to the PDF file to be read, or the PDF itself (see read_pdf).
+            data (bytes or file-like, optional): The PDF's bytes (or a buffer holding them) if they were already read, \
+                pdf_path is then not opened again.
+
+        Returns:
+            str: Extracted raw text content from the PDF.
+        '''
+        with pdf_source(pdf_path if data is None else data) as source:
+            if self.text_cache is None:
+                return self.read_pdf(source)
+
+            # backends extract slightly different text, so entries are keyed by the backend too
+            key = self.text_backend + "-" + (hash_file(source) if isinstance(source, str) else hash_stream(source))
+            text = self.text_cache.get(key)
+            if text is None:
+                text = self.read_pdf(source)
+                self.text_cache.put(key, text)
+
+        return text
+
+    def read_pdf_header(self, pdf_path, max_pages = 1, max_lines = None):
+        '''
+        Read only the header of a pdf file. Reading stops as soon as a line was found for every header flag
+        (patient, endoscope and examiner line by default), so the rest of the document is never laid out.
+        Args:
+            pdf_path (str, bytes or file-like): The path to the PDF file to be read, or the PDF itself (see read_pdf).
+            max_pages (int, optional): Maximum number of pages to read. Default is 1.
+            max_lines (int, optional): Maximum number of lines to read. Default is None (no limit).
+
+        Returns:
+            str: The header lines of the PDF.
+        '''
+        with pdf_source(pdf_path) as source:
+            return read_pdf_header(
+                source, self.header_flags, max_pages = max_pages, max_lines = max_lines, backend = self.text_backend
+            )
+
     def move_report_to_in_progress(self, pdf_path):
         '''
         Transfers a report from the 'new reports' directory to the 'in progress' directory.
+        If the journal is enabled, the claim is journaled before the report is moved. A report which \
+        another running process is claiming is treated like one which was already moved.
         
         Args:
             pdf_path (str): Path to the report to be moved.
@@ -149,14 +452,20 @@ class ReportReader:
             str: New path of the moved report.
         '''
         filename = os.path.basename(pdf_path)
-        os.rename(pdf_path, self.report_in_progress_dir + filename)
+        if not self.journal.begin(filename):
+            raise FileNotFoundError(f"{pdf_path} is being claimed by another process.")
+        try:
+            os.rename(pdf_path, self.report_in_progress_dir + filename)
+        except FileNotFoundError:
+            self.journal.finish(filename)
+            raise
         new_path = self.report_in_progress_dir + filename
 
         return new_path
 
     def move_report_to_imported(self, pdf_path):
         '''
-        Move a report from the report_in_progress_dir to the imported_report_dir.
+        Move a report from the report_in_progress_dir to the imported_report_dir and remove it from the journal.
         Args:
             pdf_path (str): Path to the report to be moved.
             
@@ -165,18 +474,21 @@ class ReportReader:
         '''
         filename = os.path.basename(pdf_path)
         os.rename(pdf_path, self.imported_report_dir + filename)
+        self.journal.finish(filename)
         new_path = self.imported_report_dir + filename
 
         return new_path
     
     
-    def extract_report_meta(self, text, pdf_path):
+    def extract_report_meta(self, text, pdf_path, new_filename = None):
         '''
         Extracts the metadata from a PDF, for example the patient info, the type of endoscope that was used and the name of the examiner into the report meta dictionary. 
         Using uuid4, a unique filename is generated. This new filename is then associated with the old filename from the pdf as well as the metadata.
         Args:
             text (str): Text content of the report.
             pdf_path (str): Path to the original PDF file.
+            new_filename (str, optional): The new filename if it was already assigned, e.g. when the report was reserved \
+                in the dedupe index. Default is None (a new one is generated).
             
         Returns:
             dict: Dictionary containing extracted metadata and associated filenames.
@@ -186,23 +498,45 @@ class ReportReader:
             patient_info_line_flag = self.flags["patient_info_line"],
             endoscope_info_line_flag = self.flags["endoscope_info_line"],
             examiner_info_line_flag = self.flags["examiner_info_line"],
-            gender_detector=self.gender_detector
+            gender_detector=self.gender_detector,
+            flags = self.flags,
+            layout = self.layout
         )
-        filename = str(uuid4())
+        filename = new_filename or str(uuid4())
         report_meta["original_filename"] = os.path.basename(pdf_path)
         report_meta["new_filename"] = filename
 
         return report_meta
 
+    def extract_report_meta_from_header(self, pdf_path, max_pages = 1, max_lines = None, data = None):
+        '''
+        Extracts the metadata of a PDF from its header only, for metadata-only jobs like indexing or \
+        deduplication which do not need the full text. The report is neither moved nor anonymized.
+        Args:
+            pdf_path (str): Path to the PDF file.
+            max_pages (int, optional): Maximum number of pages to read. Default is 1.
+            max_lines (int, optional): Maximum number of lines to read. Default is None (no limit).
+            data (bytes, optional): The PDF's bytes if they were already read, pdf_path is then not opened again.
+
+        Returns:
+            dict: Dictionary containing extracted metadata and associated filenames.
+        '''
+        header_text = self.read_pdf_header(
+            pdf_path if data is None else data, max_pages = max_pages, max_lines = max_lines
+        )
+        return self.extract_report_meta(header_text, pdf_path)
+
     def process_report(
         self,
         pdf_path,
-        verbose = True
+        verbose = True,
+        timer = None
     ):
         '''
         Orchestrates the entire report processing pipeline:
             - Moves the report to the 'in progress' directory.
-            - Reads the report's content.
+            - If deduplication is enabled, moves already imported reports straight to the 'imported' directory.
+            - Reads the report's content (from the text cache, if enabled).
             - Extracts metadata.
             - Anonymizes the content.
             - Saves the original and anonymized content in designated directories.
@@ -211,25 +545,219 @@ class ReportReader:
         Args:
             pdf_path (str): Path to the report to be processed.
             verbose (bool, optional): Flag to control the display of processing logs. Default is True.
+            timer (StageTimer, optional): Collects the duration of each processing stage. Default is None (no timing).
             
         Returns:
             tuple: Contains a boolean indicating success, the anonymized text, and the extracted metadata.
+            If the report was already claimed by another process, (False, None, None) is returned.
+            For a duplicate, the metadata only holds original_filename and duplicate_of, the new_filename of the existing record.
         '''
         
+        timer = timer or NULL_TIMER
+
         if verbose:
             print(f"Processing {pdf_path}")
 
-        pdf_path = self.move_report_to_in_progress(pdf_path)
+        # Renaming into the 'in progress' directory is atomic, so only one process can claim a report.
+        try:
+            with timer.stage("claim"):
+                pdf_path = self.move_report_to_in_progress(pdf_path)
+        except FileNotFoundError:
+            if verbose:
+                print(f"Skipping {pdf_path}, it was already claimed by another process.")
+            return False, None, None
 
         if verbose:
             print(f"Moved to in_progress ( {pdf_path} )")
 
-        text = self.read_pdf(pdf_path)
-        report_meta = self.extract_report_meta(
-            text,
-            pdf_path
+        # a failing report stays in import/tmp, only crashed reports are recovered from the journal
+        with self.journal.finish_on_error(os.path.basename(pdf_path)):
+            new_filename = None
+            if self.dedupe_index:
+                with timer.stage("dedupe"):
+                    duplicate_of, new_filename = self.check_duplicate(pdf_path)
+                if duplicate_of is not None:
+                    if verbose:
+                        print(f"{pdf_path} is a duplicate of {duplicate_of}, moving it to imported.")
+                    return True, None, self.import_duplicate(pdf_path, duplicate_of)
+
+            try:
+                with timer.stage("read_pdf"):
+                    text = self.read_report_text(pdf_path)
+                with timer.stage("extract_report_meta"):
+                    report_meta = self.extract_report_meta(
+                        text,
+                        pdf_path,
+                        new_filename = new_filename
+                    )
+                with timer.stage("anonymize_report"):
+                    anonymized_text = self.anonymize_text(text, report_meta)
+
+                self.write_report_outputs(pdf_path, text, report_meta, anonymized_text, timer = timer)
+            except Exception:
+                self.release_reservation(new_filename)
+                raise
+
+        return True, anonymized_text, report_meta
+
+    def check_duplicate(self, pdf_path, data = None):
+        '''
+        Looks up a report in the dedupe index by the SHA-256 of its bytes and by the header key \
+        (casenumber, examination date and time) read from its first page, and reserves both for the report \
+        if it is no duplicate. Reserving is atomic, so a copy claimed at the same time by another thread or \
+        process is detected as a duplicate of this report. Only the header is read, so duplicates are detected \
+        before the full text is extracted. The reservation must be released if the report fails, see release_reservation.
+        Args:
+            pdf_path (str): Path of the report in the 'in progress' directory.
+            data (bytes, optional): The report's bytes if they were already read, pdf_path is then not opened again.
+
+        Returns:
+            tuple: The new_filename of the already imported (or reserved) report, None if there is none, and the \
+            new_filename reserved for this report, None if it is a duplicate.
+        '''
+        file_hash = hash_file(pdf_path) if data is None else hashlib.sha256(data).hexdigest()
+        duplicate_of = self.dedupe_index.find(file_hash = file_hash)
+        if duplicate_of is not None:
+            return duplicate_of, None
+
+        new_filename = str(uuid4())
+        duplicate_of = self.dedupe_index.reserve(
+            new_filename,
+            file_hash = file_hash,
+            header_key = header_key(self.extract_report_meta_from_header(pdf_path, data = data))
         )
-        anonymized_text = anonymize_report(
+        if duplicate_of is not None:
+            return duplicate_of, None
+
+        # with the new_filename in the journal, the reservation is rolled back if the process crashes
+        self.journal.update(os.path.basename(pdf_path), "claimed", new_filename = new_filename)
+        return None, new_filename
+
+    def release_reservation(self, new_filename):
+        '''
+        Removes the dedupe index reservation of a report which failed, so a later copy is processed again. \
+        Does nothing if deduplication is disabled or new_filename is None.
+        '''
+        if self.dedupe_index and new_filename:
+            self.dedupe_index.remove(new_filename)
+
+    def import_duplicate(self, pdf_path, duplicate_of):
+        '''
+        Moves a duplicate report from the 'in progress' to the 'imported' directory without processing it \
+        and records the link to the existing record in the dedupe index. The existing record may still be \
+        in progress; if it fails, the link points to a report which was not imported.
+        Args:
+            pdf_path (str): Path of the report in the 'in progress' directory.
+            duplicate_of (str): new_filename of the already imported report.
+
+        Returns:
+            dict: Metadata of the duplicate with the keys original_filename and duplicate_of.
+        '''
+        original_filename = os.path.basename(pdf_path)
+        self.dedupe_index.add_duplicate(original_filename, duplicate_of)
+        self.move_report_to_imported(pdf_path)
+        return {"original_filename": original_filename, "duplicate_of": duplicate_of}
+    
+    def claim_and_read_report(self, pdf_path):
+        '''
+        Claims a report by moving it to the 'in progress' directory and reads its bytes.
+        Args:
+            pdf_path (str): Path to the report in the 'new reports' directory.
+
+        Returns:
+            tuple: New path of the report and its bytes, or None if another process already claimed it.
+        '''
+        try:
+            pdf_path = self.move_report_to_in_progress(pdf_path)
+        except FileNotFoundError:
+            return None
+
+        with open(pdf_path, "rb") as f:
+            return pdf_path, f.read()
+
+    def parse_report(self, pdf_path, data = None, new_filename = None):
+        '''
+        Reads the text of a report, extracts its metadata and anonymizes it, without writing or moving anything.
+        Args:
+            pdf_path (str): Path to the report.
+            data (bytes or file-like, optional): The report's bytes (or a buffer holding them) if they were already read.
+            new_filename (str, optional): The new filename if it was already assigned, see extract_report_meta.
+
+        Returns:
+            tuple: The raw text, the extracted metadata and the anonymized text.
+        '''
+        text = self.read_report_text(pdf_path, data = data)
+        report_meta = self.extract_report_meta(text, pdf_path, new_filename = new_filename)
+        return text, report_meta, self.anonymize_text(text, report_meta)
+
+    def process_bytes(self, data, filename = "report.pdf"):
+        '''
+        Processes a report which is held in memory, e.g. received from a message queue, without writing it \
+        to disk: reads its text, extracts its metadata and anonymizes it. The inbox folders are not touched \
+        and no outputs are written, storing the results is up to the caller.
+        Args:
+            data (bytes or file-like): The PDF as bytes, bytearray, memoryview, mmap or seekable binary file-like object.
+            filename (str, optional): File name recorded as original_filename in the metadata. Default is "report.pdf".
+
+        Returns:
+            tuple: The raw text, the extracted metadata and the anonymized text.
+        '''
+        return self.parse_report(filename, data = data)
+
+    def write_report_outputs(self, pdf_path, text, report_meta, anonymized_text, timer = None):
+        '''
+        Saves the raw text, the metadata (via the metadata sink) and the anonymized text of a report in the working directories \
+        and moves the processed PDF from the 'in progress' to the 'imported' directory.
+        Args:
+            pdf_path (str): Path of the report in the 'in progress' directory.
+            text (str): Raw text content of the report.
+            report_meta (dict): Metadata extracted from the report, including new_filename.
+            anonymized_text (str): The anonymized text.
+            timer (StageTimer, optional): Collects the duration of each write and of the move. Default is None.
+
+        Returns:
+            str: New path of the moved report.
+        '''
+        timer = timer or NULL_TIMER
+        filename = report_meta["new_filename"] # gets added in self.extract_report_meta
+        # record the new_filename before writing, so partial outputs can be rolled back after a crash
+        self.journal.update(os.path.basename(pdf_path), "parsed", new_filename = filename)
+
+        raw_name = self.text_store.raw_name(os.path.basename(pdf_path), filename)
+        with timer.stage("write_raw"):
+            self.text_store.put("raw", raw_name, text)
+
+        # write the metadata to the metadata sink (by default a json file per report)
+        with timer.stage("write_metadata"):
+            self.metadata_sink.write(report_meta)
+            if self.metadata_index:
+                self.metadata_index.add(report_meta)
+
+        # write the anonymized text to the text store (by default a new text file)
+        with timer.stage("write_anonymized"):
+            self.text_store.put("anonymized", filename, anonymized_text)
+
+        if self.journal.enabled:
+            # buffered metadata would be lost in a crash, so it must be on disk before the outputs count as written
+            self.metadata_sink.flush()
+            self.journal.update(os.path.basename(pdf_path), "written")
+
+        # move the pdf file to the imported folder
+        with timer.stage("move_to_imported"):
+            return self.move_report_to_imported(pdf_path)
+
+    def anonymize_text(self, text, report_meta):
+        '''
+        Anonymizes the raw text of a report, replacing names and dates from its metadata as well as \
+        employee names and large numbers, and cutting off the text outside the cutoff flags.
+        Args:
+            text (str): Raw text content of the report.
+            report_meta (dict): Metadata extracted from the report.
+
+        Returns:
+            str: The anonymized text.
+        '''
+        return anonymize_report(
             text = text,
             report_meta = report_meta,
             text_date_format = DEFAULT_SETTINGS["text_date_format"],
@@ -237,43 +765,508 @@ class ReportReader:
             upper_cut_off_flags=DEFAULT_SETTINGS["flags"]["cut_off_above"],
             locale = self.locale,
             first_names = self.employee_first_names,
-            last_names = self.employee_last_names
+            last_names = self.employee_last_names,
+            fake_pool = self.fake_pool,
+            name_matcher = self.name_matcher
         )
 
+    def process_new_reports(self, verbose = True, workers = None, timings = False, write_metrics = False):
+        '''
+        Handles the processing of all new reports found in the designated directory.
+        With workers > 1, the reports are processed in a pool of worker processes. Each worker builds
+        its own ReportReader once and claims reports by renaming them into the 'in progress' directory.
+        
+        Args:
+            verbose (bool, optional): Flag to control the display of processing logs. Default is True.
+            workers (int, optional): Number of worker processes. Default is None (process serially).
+            timings (bool, optional): Time each stage of process_report and summarize the durations. Default is False.
+            write_metrics (bool, optional): Also write the timing summary to working/metrics_<timestamp>.json. \
+                Implies timings. Default is False.
+            
+        Returns:
+            dict: Contains the keys
+                - 'processed': Dictionary mapping each processed report path to its metadata.
+                - 'skipped': List of report paths that were claimed by another process.
+                - 'failed': Dictionary mapping each failed report path to its error message.
+                - 'duplicates': Only with deduplication, dictionary mapping each report path which duplicates an \
+                  imported report to the new_filename of that report.
+                - 'timings': Only with timings, dictionary mapping each stage to count, total, mean, p50, p95, p99 \
+                  and max of its durations in seconds.
+        '''
+        new_reports = self.get_new_reports()
+        if verbose:
+            print(f"Found {len(new_reports)} new reports.")
 
-        filename = report_meta["new_filename"] # gets added in self.extract_report_meta
+        return self.process_reports(
+            new_reports, verbose = verbose, workers = workers, timings = timings, write_metrics = write_metrics
+        )
+
+    def process_reports(self, reports, verbose = True, workers = None, timings = False, write_metrics = False):
+        '''
+        Processes the given reports, see process_new_reports for the arguments and the returned results.
+        Args:
+            reports (List[str]): Paths of the reports in the 'new reports' directory.
+        '''
+        timings = timings or write_metrics
+        batch_start = time.perf_counter()
 
-        raw_filename = os.path.splitext(os.path.basename(pdf_path))[0]
-        with open(self.raw_report_dir + raw_filename + ".txt", "w", encoding="utf-8") as f:
-            f.write(text)
+        results = {"processed": {}, "skipped": [], "failed": {}}
+        if self.dedupe_index:
+            results["duplicates"] = {}
+        timer = StageTimer() if timings else None
 
-        # write the metadata to a json file
-        with open(self.metadata_report_dir + filename + ".json", "w", encoding="utf-8") as f:
-            json.dump(report_meta, f)
+        if workers and workers > 1 and len(reports) > 1:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(
+                max_workers = min(workers, len(reports)),
+                initializer = _init_worker,
+                initargs = (self.get_reader_kwargs(),)
+            ) as executor:
+                futures = {
+                    executor.submit(_process_report_in_worker, report, verbose, timings): report
+                    for report in reports
+                }
+                for future in as_completed(futures):
+                    report = futures[future]
+                    try:
+                        success, report_meta, durations = future.result()
+                    except Exception as e:
+                        results["failed"][report] = f"{type(e).__name__}: {e}"
+                        continue
+                    if timer:
+                        timer.merge(durations)
+                    self._collect_result(results, report, success, report_meta)
+        else:
+            for report in reports:
+                try:
+                    success, _, report_meta = self.process_report(report, verbose = verbose, timer = timer)
+                except Exception as e:
+                    results["failed"][report] = f"{type(e).__name__}: {e}"
+                    continue
+                self._collect_result(results, report, success, report_meta)
 
-        # Write the anonymized text to a new text file
-        with open(self.anonymized_report_dir + filename + ".txt", "w", encoding="utf-8") as f:
-            f.write(anonymized_text)
+        self.metadata_sink.flush()
 
-        # move the pdf file to the imported folder
-        pdf_path = self.move_report_to_imported(pdf_path)
+        if verbose:
+            print(
+                f"Processed {len(results['processed'])} reports, "
+                f"skipped {len(results['skipped'])}, failed {len(results['failed'])}."
+            )
 
-        return True, anonymized_text, report_meta
-    
-    def process_new_reports(self, verbose = True):
+        if timings:
+            results["timings"] = timer.summary()
+        if write_metrics:
+            self.write_metrics(results, time.perf_counter() - batch_start)
+
+        return results
+
+    def watch(
+        self,
+        verbose = True,
+        workers = None,
+        settle_time = 2.0,
+        poll_interval = 1.0,
+        batch_size = 50,
+        batch_window = 5.0,
+        use_inotify = True,
+        on_batch = None,
+        stop_event = None,
+        max_batches = None,
+        timings = False,
+        write_metrics = False
+    ):
         '''
-        Handles the processing of all new reports found in the designated directory.
+        Long-running ingestion mode: watches the 'new reports' directory (with inotify if the optional \
+        inotify_simple package is available, polling otherwise) and processes new PDFs in micro-batches \
+        once their size has stopped changing. Runs until stop_event is set or max_batches batches were processed.
         
         Args:
             verbose (bool, optional): Flag to control the display of processing logs. Default is True.
+            workers (int, optional): Number of worker processes per batch. Default is None (process serially).
+            settle_time (float, optional): Seconds a PDF's size must stay unchanged before it is processed. Default is 2.0.
+            poll_interval (float, optional): Seconds between directory scans. Default is 1.0.
+            batch_size (int, optional): Maximum number of reports per batch. Default is 50.
+            batch_window (float, optional): Seconds to wait for more reports once the first one is ready. Default is 5.0.
+            use_inotify (bool, optional): Use inotify if available. Default is True.
+            on_batch (callable, optional): Called with the results of each batch (see process_new_reports).
+            stop_event (threading.Event, optional): Stops watching once set.
+            max_batches (int, optional): Stops watching after this many batches. Default is None (no limit).
+            timings (bool, optional): Time the stages of each batch, see process_new_reports. Default is False.
+            write_metrics (bool, optional): Write a metrics file per batch, see process_new_reports. Default is False.
             
         Returns:
-            bool: True if processing is successful, otherwise False.        
+            dict: The merged 'processed', 'skipped', 'failed' and (with deduplication) 'duplicates' results of all batches.
         '''
-        new_reports = self.get_new_reports()
+        watcher = InboxWatcher(
+            self.new_report_dir,
+            settle_time = settle_time,
+            poll_interval = poll_interval,
+            batch_size = batch_size,
+            batch_window = batch_window,
+            use_inotify = use_inotify
+        )
         if verbose:
-            print(f"Found {len(new_reports)} new reports.")
-        for report in new_reports:
-            self.process_report(report, verbose = verbose)
+            print(f"Watching {self.new_report_dir} ({'inotify' if watcher.use_inotify else 'polling'}).")
+
+        total = {"processed": {}, "skipped": [], "failed": {}}
+        if self.dedupe_index:
+            total["duplicates"] = {}
+        batches = 0
+        try:
+            while max_batches is None or batches < max_batches:
+                batch = watcher.next_batch(stop_event)
+                if batch is None:
+                    break
+
+                if verbose:
+                    print(f"Processing batch of {len(batch)} new reports.")
+                results = self.process_reports(
+                    batch, verbose = verbose, workers = workers, timings = timings, write_metrics = write_metrics
+                )
+                batches += 1
+
+                total["processed"].update(results["processed"])
+                total["skipped"].extend(results["skipped"])
+                total["failed"].update(results["failed"])
+                if self.dedupe_index:
+                    total["duplicates"].update(results["duplicates"])
+                if on_batch:
+                    on_batch(results)
+        finally:
+            watcher.close()
+
+        return total
+
+    def run_pipeline(self, reports = None, verbose = True, workers = None, io_threads = 4, queue_size = 8):
+        '''
+        Processes reports in an asyncio pipeline, see process_reports_async.
+        Args:
+            reports (List[str], optional): Paths of the reports. Default is None (all new reports).
+
+        Returns:
+            dict: The 'processed', 'skipped' and 'failed' results, see process_new_reports.
+        '''
+        if reports is None:
+            reports = self.get_new_reports()
+            if verbose:
+                print(f"Found {len(reports)} new reports.")
+
+        import asyncio
+        return asyncio.run(self.process_reports_async(
+            reports, verbose = verbose, workers = workers, io_threads = io_threads, queue_size = queue_size
+        ))
+
+    async def process_reports_async(self, reports, verbose = True, workers = None, io_threads = 4, queue_size = 8):
+        '''
+        Processes reports in three overlapping stages connected by bounded queues:
+            - claim: moves each report to the 'in progress' directory and reads its bytes (thread executor). \
+              With deduplication, already imported reports are moved on to the 'imported' directory here.
+            - parse: reads the text, extracts metadata and anonymizes (process pool).
+            - write: saves the outputs and moves the report to the 'imported' directory (thread executor).
+        While the process pool parses, the threads keep claiming, reading and writing, so disk latency \
+        (e.g. on a network share) overlaps with CPU work. A stage waits once its output queue is full.
+        
+        Args:
+            reports (List[str]): Paths of the reports in the 'new reports' directory.
+            verbose (bool, optional): Flag to control the display of processing logs. Default is True.
+            workers (int, optional): Number of parsing processes. Default is None (number of CPUs).
+            io_threads (int, optional): Number of threads for claiming, reading and writing. Default is 4.
+            queue_size (int, optional): Maximum number of reports waiting between two stages. Default is 8.
+            
+        Returns:
+            dict: The 'processed', 'skipped', 'failed' and (with deduplication) 'duplicates' results, see process_new_reports.
+        '''
+        import asyncio
+        from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+        loop = asyncio.get_running_loop()
+        workers = workers or os.cpu_count() or 1
+        results = {"processed": {}, "skipped": [], "failed": {}}
+        if self.dedupe_index:
+            results["duplicates"] = {}
+        parse_queue = asyncio.Queue(maxsize = queue_size)
+        write_queue = asyncio.Queue(maxsize = queue_size)
+        # shared by all claim tasks, so each report is claimed once
+        pending_reports = iter(reports)
+
+        def fail(report, e, new_filename = None):
+            results["failed"][report] = f"{type(e).__name__}: {e}"
+            # a crashed worker process is recovered from the journal on the next start
+            if not isinstance(e, BrokenExecutor):
+                self.release_reservation(new_filename)
+                self.journal.finish(os.path.basename(report))
+
+        with ThreadPoolExecutor(max_workers = io_threads) as io_executor, ProcessPoolExecutor(
+            max_workers = workers,
+            initializer = _init_worker,
+            initargs = (self.get_reader_kwargs(),)
+        ) as cpu_executor:
+
+            async def claim():
+                for report in pending_reports:
+                    try:
+                        claimed = await loop.run_in_executor(io_executor, self.claim_and_read_report, report)
+                    except Exception as e:
+                        fail(report, e)
+                        continue
+                    if claimed is None:
+                        results["skipped"].append(report)
+                        continue
+                    pdf_path, data = claimed
+                    new_filename = None
+                    if self.dedupe_index:
+                        try:
+                            duplicate_of, new_filename = await loop.run_in_executor(
+                                io_executor, self.check_duplicate, pdf_path, data
+                            )
+                            if duplicate_of is not None:
+                                await loop.run_in_executor(io_executor, self.import_duplicate, pdf_path, duplicate_of)
+                                results["duplicates"][report] = duplicate_of
+                                continue
+                        except Exception as e:
+                            fail(report, e)
+                            continue
+                    await parse_queue.put((report, pdf_path, data, new_filename))
+
+            async def parse():
+                while (item := await parse_queue.get()) is not None:
+                    report, pdf_path, data, new_filename = item
+                    try:
+                        parsed = await loop.run_in_executor(
+                            cpu_executor, _parse_report_in_worker, pdf_path, data, new_filename
+                        )
+                    except Exception as e:
+                        fail(report, e, new_filename)
+                        continue
+                    await write_queue.put((report, pdf_path, new_filename, *parsed))
+
+            async def write():
+                while (item := await write_queue.get()) is not None:
+                    report, pdf_path, new_filename, text, report_meta, anonymized_text = item
+                    try:
+                        await loop.run_in_executor(
+                            io_executor, self.write_report_outputs, pdf_path, text, report_meta, anonymized_text
+                        )
+                    except Exception as e:
+                        fail(report, e, new_filename)
+                        continue
+                    results["processed"][report] = report_meta
+
+            parsers = [asyncio.create_task(parse()) for _ in range(workers)]
+            writers = [asyncio.create_task(write()) for _ in range(io_threads)]
+
+            await asyncio.gather(*(claim() for _ in range(io_threads)))
+            for _ in parsers:
+                await parse_queue.put(None)
+            await asyncio.gather(*parsers)
+            for _ in writers:
+                await write_queue.put(None)
+            await asyncio.gather(*writers)
+
+        self.metadata_sink.flush()
+
+        if verbose:
+            print(
+                f"Processed {len(results['processed'])} reports, "
+                f"skipped {len(results['skipped'])}, failed {len(results['failed'])}."
+            )
+
+        return results
+
+    def write_metrics(self, results, batch_duration):
+        '''
+        Writes the report counts and stage timings of a batch to working/metrics_<timestamp>.json.
+        Args:
+            results (dict): Results of process_new_reports, including 'timings'.
+            batch_duration (float): Wall time of the batch in seconds.
+
+        Returns:
+            str: Path of the written metrics file.
+        '''
+        now = datetime.now()
+        metrics = {
+            "timestamp": now.isoformat(timespec="seconds"),
+            "batch_duration": batch_duration,
+            "processed": len(results["processed"]),
+            "skipped": len(results["skipped"]),
+            "failed": len(results["failed"]),
+            "duplicates": len(results.get("duplicates", {})),
+            "timings": results.get("timings", {}),
+        }
+        metrics_path = os.path.join(self.report_root_path, "working", f"metrics_{now:%Y%m%d_%H%M%S_%f}.json")
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+
+        return metrics_path
+
+    def _collect_result(self, results, report, success, report_meta):
+        if success and "duplicate_of" in report_meta:
+            results["duplicates"][report] = report_meta["duplicate_of"]
+        elif success:
+            results["processed"][report] = report_meta
+        else:
+            results["skipped"].append(report)
+
+
+    def get_settings_fingerprint(self):
+        '''
+        Returns a SHA-256 hex digest of all settings that influence the anonymized output \
+        (locale, employee names, flags and the text date format).
+        '''
+        settings = {
+            "locale": self.locale,
+            "first_names": list(self.employee_first_names),
+            "last_names": list(self.employee_last_names),
+            "flags": self.flags,
+            "cut_off_flags": [DEFAULT_SETTINGS["flags"]["cut_off_below"], DEFAULT_SETTINGS["flags"]["cut_off_above"]],
+            "text_date_format": DEFAULT_SETTINGS["text_date_format"],
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def reanonymize_report(self, report_meta, previous_fingerprint = None):
+        '''
+        Anonymizes a report again from its metadata and the corresponding raw text in the text store. \
+        The anonymized text is only written if the fingerprint of raw text, metadata and settings differs \
+        from previous_fingerprint.
+        Args:
+            report_meta (dict): The report's metadata as written by the metadata sink.
+            previous_fingerprint (str, optional): Fingerprint the anonymized text was last written with.
+
+        Returns:
+            tuple: The report's new_filename, its current fingerprint and a boolean indicating whether the
+            anonymized text was written.
+        '''
+        raw_name = self.text_store.raw_name(report_meta["original_filename"], report_meta["new_filename"])
+        original_name = os.path.splitext(report_meta["original_filename"])[0]
+        try:
+            text = self.text_store.get("raw", raw_name)
+        except KeyError:
+            if raw_name == original_name:
+                raise
+            # raw texts migrated from the directories are still stored under the original file name
+            text = self.text_store.get("raw", original_name)
+
+        fingerprint = hashlib.sha256()
+        fingerprint.update(self.get_settings_fingerprint().encode("utf-8"))
+        fingerprint.update(json.dumps(report_meta, sort_keys=True).encode("utf-8"))
+        fingerprint.update(text.encode("utf-8"))
+        fingerprint = fingerprint.hexdigest()
+
+        filename = report_meta["new_filename"]
+        if fingerprint == previous_fingerprint:
+            return filename, fingerprint, False
+
+        self.text_store.put("anonymized", filename, self.anonymize_text(text, report_meta))
+
+        return filename, fingerprint, True
+
+    def reanonymize_all(self, verbose = True, workers = None):
+        '''
+        Re-anonymizes all reports from their raw text and the metadata of the metadata sink, without \
+        touching the PDFs. Use this after changing the name lists or flags. Only reports whose raw text, \
+        metadata or settings fingerprint changed since the last run are written again. The fingerprints \
+        are stored in working/anonymized_fingerprints.json.
         
-        return True
\ No newline at end of file
+        Args:
+            verbose (bool, optional): Flag to control the display of processing logs. Default is True.
+            workers (int, optional): Number of worker processes. Default is None (process serially).
+            
+        Returns:
+            dict: Contains the keys
+                - 'written': List of new_filenames whose anonymized text was written.
+                - 'unchanged': List of new_filenames which were up to date.
+                - 'failed': Dictionary mapping each failed new_filename (or unreadable metadata record) to its error message.
+        '''
+        fingerprints = {}
+        if os.path.exists(self.anonymization_fingerprints_path):
+            with open(self.anonymization_fingerprints_path, "r", encoding="utf-8") as f:
+                fingerprints = json.load(f)
+
+        results = {"written": [], "unchanged": [], "failed": {}}
+
+        def collect(report_meta, compute):
+            try:
+                filename, fingerprint, written = compute()
+            except Exception as e:
+                results["failed"][report_meta.get("new_filename")] = f"{type(e).__name__}: {e}"
+                return
+            fingerprints[filename] = fingerprint
+            results["written" if written else "unchanged"].append(filename)
+
+        # records are streamed from the sink, unreadable ones are recorded in results["failed"]
+        self.metadata_sink.flush()
+        reports_meta = self.metadata_sink.iter_metadata(errors = results["failed"])
+
+        if workers and workers > 1:
+            from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+            with ProcessPoolExecutor(
+                max_workers = workers,
+                initializer = _init_worker,
+                initargs = (self.get_reader_kwargs(),)
+            ) as executor:
+                # at most two records per worker are in flight, so memory does not grow with the number of reports
+                futures = {}
+                for report_meta in reports_meta:
+                    if len(futures) >= 2 * workers:
+                        done, _ = wait(futures, return_when = FIRST_COMPLETED)
+                        for future in done:
+                            collect(futures.pop(future), future.result)
+                    future = executor.submit(
+                        _reanonymize_report_in_worker, report_meta, fingerprints.get(report_meta.get("new_filename"))
+                    )
+                    futures[future] = report_meta
+                for future in wait(futures).done:
+                    collect(futures[future], future.result)
+        else:
+            for report_meta in reports_meta:
+                collect(
+                    report_meta,
+                    lambda: self.reanonymize_report(report_meta, fingerprints.get(report_meta.get("new_filename")))
+                )
+
+        tmp_path = self.anonymization_fingerprints_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(fingerprints, f)
+        os.replace(tmp_path, self.anonymization_fingerprints_path)
+
+        if verbose:
+            print(
+                f"Re-anonymized {len(results['written'])} reports, "
+                f"{len(results['unchanged'])} unchanged, {len(results['failed'])} failed."
+            )
+
+        return results
+
+    def query_reports(self, examination_date_from = None, examination_date_to = None, limit = None, **fields):
+        '''
+        Looks up reports in the metadata index, see MetadataIndex.query.
+        Args:
+            examination_date_from (str, optional): First examination date (YYYY-MM-DD) to include.
+            examination_date_to (str, optional): Last examination date (YYYY-MM-DD) to include.
+            limit (int, optional): Maximum number of results.
+            **fields: Metadata values to match exactly, e.g. casenumber, endoscope or examiner_last_name.
+
+        Returns:
+            List[dict]: The metadata of the matching reports.
+        '''
+        if not self.metadata_index:
+            raise RuntimeError("The metadata index is disabled, create the ReportReader with metadata_index=True.")
+        return self.metadata_index.query(examination_date_from, examination_date_to, limit, **fields)
+
+    def rebuild_metadata_index(self, verbose = True):
+        '''
+        Rebuilds the metadata index from all records of the metadata sink, e.g. after enabling the index \
+        for reports which were processed without it.
+
+        Returns:
+            int: Number of indexed reports.
+        '''
+        if not self.metadata_index:
+            raise RuntimeError("The metadata index is disabled, create the ReportReader with metadata_index=True.")
+        self.metadata_sink.flush()
+        errors = {}
+        count = self.metadata_index.rebuild(self.metadata_sink.iter_metadata(errors = errors))
+        if errors:
+            warnings.warn(f"Skipped {len(errors)} unreadable metadata records: {', '.join(sorted(errors))}.")
+        if verbose:
+            print(f"Indexed the metadata of {count} reports.")
+        return count
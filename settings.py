@@ -72,14 +72,40 @@ A dictionary containing default settings and configurations:
 locale: Specifies the locale (in this case, German) which might be used for date formatting, text processing, or generating fake data for anonymization.
 first_names: Default list of first names.
 last_names: Default list of last names.
+layout: Report layout whose registered field extractors (see extraction.registry) are used for metadata extraction.
 text_date_format: Specifies the format for dates found within the text. For instance, '%d.%m.%Y' corresponds to dates formatted as "dd.mm.yyyy".
+fake_buffer_size: Number of fake names and dates pre-generated per refill of the anonymization buffers (0 disables buffering).
+text_cache_max_bytes: Maximum total size in bytes of the extracted text cache in working/text_cache.
+text_cache_max_age: Maximum age in seconds of an entry of the extracted text cache.
+metadata_sink: Output sink for report metadata, "json" (one file per report in working/metadata), "jsonl" or "parquet".
+text_store: Storage of the raw and anonymized texts, "files" (one .txt per text in working/raw and working/anonymized) or "sqlite" (packed in working/texts.sqlite).
+metadata_index: If True, the metadata of all processed reports is also kept in the queryable SQLite index working/index.sqlite.
+deduplicate: If True, reports whose bytes or header (casenumber, examination date and time) match an imported report are moved to import/imported without processing.
+journal: If True, the stages of each report are journaled in working/journal.sqlite and outputs are written atomically, so reports left in import/tmp by a crash are resumed or rolled back on start-up.
+page_workers: Number of processes reading the page ranges of long PDFs in parallel, 0 disables chunked reading. Pool workers always read serially.
+page_chunk_min_pages: Page count from which a PDF is read in parallel page ranges if page_workers is set.
+text_backend: Library extracting the text of PDFs: "pdfplumber" (character-level layout analysis), "pdfminer", "pypdf" (if installed) or "pdfium" (via pypdfium2).
+gender_cache_size: Maximum number of first names whose detected gender is memoized.
 flags: A nested dictionary containing the flags used to identify specific lines or sections within the report for extraction, truncation, or anonymization.
 '''
 DEFAULT_SETTINGS = {
     "locale": "de_DE",
     "first_names": FIRST_NAMES,
     "last_names": LAST_NAMES,
+    "layout": "default",
     "text_date_format":'%d.%m.%Y',
+    "fake_buffer_size": 0,
+    "text_cache_max_bytes": 1024**3,
+    "text_cache_max_age": 90 * 24 * 60 * 60,
+    "metadata_sink": "json",
+    "text_store": "files",
+    "metadata_index": False,
+    "deduplicate": False,
+    "journal": False,
+    "page_workers": 0,
+    "page_chunk_min_pages": 30,
+    "text_backend": "pdfplumber",
+    "gender_cache_size": 4096,
     "flags": {
         "patient_info_line": PATIENT_INFO_LINE_FLAG,
         "endoscope_info_line": ENDOSCOPE_INFO_LINE_FLAG,
@@ -0,0 +1,57 @@
+import os
+import threading
+
+class SqliteDatabase:
+    '''
+    Lazily opened SQLite connection shared by the threads of one process. The database runs in WAL mode, \
+    so pool workers can write concurrently while other processes read. Forked worker processes get their \
+    own connection on first use.
+    '''
+
+    def __init__(self, path, schema):
+        '''
+        Args:
+            path (str): Path of the database file, created on first use.
+            schema (List[str]): Statements creating the tables and indexes if they don't exist yet.
+        '''
+        self.path = path
+        self.schema = schema
+        self.lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def connect(self):
+        '''
+        Returns the connection of the current process. Callers must hold self.lock while using it.
+        '''
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+            self._connection = sqlite3.connect(self.path, timeout = 30, check_same_thread = False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            with self._connection:
+                for statement in self.schema:
+                    self._connection.execute(statement)
+            self._pid = os.getpid()
+        return self._connection
+
+    def execute(self, sql, parameters = ()):
+        '''
+        Executes a statement in its own transaction and returns all resulting rows.
+        '''
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                return connection.execute(sql, parameters).fetchall()
+
+    def executemany(self, sql, rows):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.executemany(sql, rows)
+
+    def close(self):
+        with self.lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
@@ -471,3 +471,912 @@ def test_folder_creation_with_partial_existing_structure():
         assert mock_makedirs.called
 
 
+
+
+TEST_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_files")
+
+def test_process_report_already_claimed(tmp_path):
+    """
+    Test that `process_report` skips a report which was already claimed (moved away) by another process.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path))
+    success, anonymized_text, report_meta = reader.process_report(reader.new_report_dir + "missing.pdf", verbose=False)
+    assert success is False
+    assert anonymized_text is None and report_meta is None
+
+def test_process_new_reports_with_workers_collects_failures(tmp_path):
+    """
+    Test that `process_new_reports` with a process pool returns per-report failures instead of raising.
+    
+    The Hello World PDF contains none of the cutoff flags, so every report fails during anonymization
+    and stays in the 'in progress' directory.
+    """
+    import shutil
+    reader = ReportReader(report_root_path=str(tmp_path))
+    for name in ["a.pdf", "b.pdf", "c.pdf"]:
+        shutil.copy(os.path.join(TEST_FILES_DIR, "Hello_World.pdf"), reader.new_report_dir + name)
+
+    results = reader.process_new_reports(verbose=False, workers=2)
+
+    assert results["processed"] == {}
+    assert results["skipped"] == []
+    assert sorted(os.path.basename(path) for path in results["failed"]) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert all("No cutoff leading text flag" in error for error in results["failed"].values())
+    assert sorted(os.listdir(reader.report_in_progress_dir)) == ["a.pdf", "b.pdf", "c.pdf"]
+
+def test_determine_gender_uses_given_detector_and_memoizes():
+    """
+    Test that `determine_gender` uses the detector it is given and only queries it once per first name.
+    """
+    from ..utils import determine_gender, set_gender_cache_size
+    detector = MagicMock()
+    detector.get_gender.return_value = "female"
+    set_gender_cache_size(16)
+
+    assert determine_gender("Anja", detector) == "female"
+    assert determine_gender("Anja", detector) == "female"
+    detector.get_gender.assert_called_once_with("Anja", "germany")
+
+def test_reader_uses_shared_gender_detector():
+    """
+    Test that all ReportReader instances share one lazily built gender detector.
+    """
+    from ..utils import get_gender_detector
+    reader = ReportReader(report_root_path="mock_path")
+    assert reader.gender_detector is get_gender_detector()
+    assert reader.gender_detector is ReportReader(report_root_path="mock_path").gender_detector
+
+def test_faker_pool_shares_faker_and_refills_buffer():
+    """
+    Test that FakerPool builds one Faker per locale and refills its buffers in bulk.
+    """
+    from ..anonymization import FakerPool
+    pool = FakerPool("de_DE", buffer_size=4)
+    assert pool.fake is FakerPool("de_DE").fake
+
+    with patch.object(pool.fake, "first_name", side_effect=["A", "B", "C", "D", "E", "F", "G", "H"]) as mock_first_name:
+        pool._generators["first_name"] = pool.fake.first_name
+        assert [pool.first_name() for _ in range(5)] == ["A", "B", "C", "D", "E"]
+        assert mock_first_name.call_count == 8
+
+    birthdate = pool.random_date_in_year(1983)
+    assert birthdate.year == 1983
+
+def test_employee_name_matcher_replaces_consistently_in_one_pass():
+    """
+    Test that EmployeeNameMatcher replaces whole names only and maps each name to a single fake name.
+    """
+    from ..anonymization import EmployeeNameMatcher
+    fake_pool = MagicMock()
+    fake_pool.first_name.side_effect = ["Petra", "Jonas"]
+    fake_pool.last_name.side_effect = ["Schmidt", "Meyer"]
+    matcher = EmployeeNameMatcher(["Anja", "Hans"], ["Lux", "Dela Cruz"])
+
+    text = "Dr. Lux, Anja und Dela Cruz. Lux war da, Hansen nicht."
+    assert matcher.replace(text, fake_pool) == "Dr. Schmidt, Petra und Meyer. Schmidt war da, Hansen nicht."
+
+def test_replace_large_numbers_single_pass():
+    """
+    Test that `replace_large_numbers` keeps repeated numbers consistent, leaves short numbers alone
+    and never replaces a replacement again.
+    """
+    from ..utils import replace_large_numbers
+    text = "Fallnummer: 0015744097 ID 12345 Raum 12 Fallnummer: 0015744097"
+    with patch("random.choices", side_effect=[list("0012345678"), list("54321")]):
+        assert replace_large_numbers(text) == "Fallnummer: 0012345678 ID 54321 Raum 12 Fallnummer: 0012345678"
+
+    anonymized = replace_large_numbers(text, consistent=False)
+    assert len(anonymized) == len(text)
+    assert "Raum 12 " in anonymized
+
+def test_read_pdf_streams_pages_and_releases_them():
+    """
+    Test that `read_pdf` joins the text of all pages, treats pages without text as empty
+    and releases each page's cached layout objects after extraction.
+    """
+    pages = [MagicMock(), MagicMock(), MagicMock()]
+    for page, text in zip(pages, ["Seite 1\n", None, "Seite 3"]):
+        page.extract_text.return_value = text
+
+    with patch("pdfplumber.open", return_value=MockPDF(pages)):
+        reader = ReportReader(report_root_path="mock_path")
+        assert reader.read_pdf("mock_path/import/tmp/report1.pdf") == "Seite 1\nSeite 3"
+
+    for page in pages:
+        page.close.assert_called_once()
+
+def test_read_pdf_header_stops_after_header_flags():
+    """
+    Test that header mode stops reading as soon as all header flags were found and never reads the second page.
+    """
+    first_page = MagicMock()
+    first_page.extract_text.return_value = (
+        "Klinikum\n"
+        "Patient: Dietrich ,Jimmy Joe geb. 06.01.1983 Fallnummer: 0015744097\n"
+        "Gerät: GIF-HQ190\n"
+        "1. Unters.: Dr. med. Lux, Thomas U-datum: 09.06.2023 09:30\n"
+        "Befund ..."
+    )
+    second_page = MagicMock()
+
+    with patch("pdfplumber.open", return_value=MockPDF([first_page, second_page])):
+        reader = ReportReader(report_root_path="mock_path")
+        report_meta = reader.extract_report_meta_from_header("mock_path/import/new/report1.pdf")
+
+    second_page.extract_text.assert_not_called()
+    assert report_meta["casenumber"] == "0015744097"
+    assert report_meta["endoscope"] == "GIF-HQ190"
+    assert report_meta["examination_date"] == "2023-06-09"
+    assert report_meta["original_filename"] == "report1.pdf"
+
+def test_read_report_text_uses_text_cache(tmp_path):
+    """
+    Test that with the text cache enabled, a PDF with identical bytes is only extracted once.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path), text_cache=True)
+    first = tmp_path / "first.pdf"
+    second = tmp_path / "second.pdf"
+    first.write_bytes(b"%PDF-1.4 same bytes")
+    second.write_bytes(b"%PDF-1.4 same bytes")
+
+    with patch.object(reader, "read_pdf", return_value="Extracted text") as mock_read_pdf:
+        assert reader.read_report_text(str(first)) == "Extracted text"
+        assert reader.read_report_text(str(second)) == "Extracted text"
+        mock_read_pdf.assert_called_once_with(str(first))
+
+    # the cache is shared by all readers of the root, but texts of other backends must not be returned
+    other_reader = ReportReader(report_root_path=str(tmp_path), text_cache=True, text_backend="pdfminer")
+    with patch.object(other_reader, "read_pdf", return_value="Extracted text ") as mock_read_pdf:
+        assert other_reader.read_report_text(str(second)) == "Extracted text "
+        mock_read_pdf.assert_called_once_with(str(second))
+
+def test_text_cache_evicts_least_recently_used_and_expired(tmp_path):
+    """
+    Test that TextCache evicts the least recently used entries beyond max_bytes and ignores expired entries.
+    """
+    from ..text_cache import TextCache
+    cache = TextCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "12345")
+    os.utime(tmp_path / "a.txt", (1, 1))
+    cache.put("b", "12345")
+    cache.put("c", "12345")
+    assert cache.get("a") is None
+    assert cache.get("b") == "12345"
+    assert cache.get("c") == "12345"
+
+    cache.max_age = 60
+    os.utime(tmp_path / "b.txt", (1, 1))
+    assert cache.get("b") is None
+    assert not (tmp_path / "b.txt").exists()
+
+def _fill_text_cache(cache_dir, worker):
+    from ..text_cache import TextCache
+    cache = TextCache(cache_dir, max_bytes=1000)
+    for i in range(200):
+        cache.put(f"{worker}-{i}", "x" * 100)
+        cache.get(f"{worker}-{i // 2}")
+    return True
+
+def test_text_cache_shared_by_processes(tmp_path):
+    """
+    Test that processes sharing one cache directory with a tiny max_bytes don't fail when another process
+    evicts the entries they are looking at.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=6) as executor:
+        futures = [executor.submit(_fill_text_cache, str(tmp_path), worker) for worker in range(6)]
+        assert [future.result() for future in futures] == [True] * 6
+
+def _write_working_report(reader, original_filename, new_filename, text):
+    with open(reader.raw_report_dir + os.path.splitext(original_filename)[0] + ".txt", "w", encoding="utf-8") as f:
+        f.write(text)
+    with open(reader.metadata_report_dir + new_filename + ".json", "w", encoding="utf-8") as f:
+        json.dump({"endoscope": "GIF-HQ190", "original_filename": original_filename, "new_filename": new_filename}, f)
+
+def test_reanonymize_all_only_writes_changed_reports(tmp_path):
+    """
+    Test that `reanonymize_all` anonymizes from working/raw and working/metadata and only rewrites
+    reports whose inputs or settings fingerprint changed.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path))
+    _write_working_report(reader, "a.pdf", "uuid-a", "Kopf\nGerät: GIF-HQ190\nBefund von Lux\n________________Fuss")
+    _write_working_report(reader, "b.pdf", "uuid-b", "Kopf\nGerät: GIF-HQ190\nBefund o.B.\n________________Fuss")
+
+    results = reader.reanonymize_all(verbose=False, workers=2)
+    assert sorted(results["written"]) == ["uuid-a", "uuid-b"]
+    with open(reader.anonymized_report_dir + "uuid-a.txt", encoding="utf-8") as f:
+        anonymized_text = f.read()
+    assert anonymized_text.startswith("Gerät: GIF-HQ190\n") and "Lux" not in anonymized_text
+
+    assert sorted(reader.reanonymize_all(verbose=False)["unchanged"]) == ["uuid-a", "uuid-b"]
+
+    _write_working_report(reader, "b.pdf", "uuid-b", "Kopf\nGerät: GIF-HQ190\nBefund neu\n________________Fuss")
+    assert reader.reanonymize_all(verbose=False)["written"] == ["uuid-b"]
+
+    changed_reader = ReportReader(report_root_path=str(tmp_path), employee_last_names=["Lux", "Meining"])
+    assert sorted(changed_reader.reanonymize_all(verbose=False)["written"]) == ["uuid-a", "uuid-b"]
+
+def test_reanonymize_all_skips_unreadable_metadata(tmp_path):
+    """
+    Test that an unreadable metadata record (the empty one of the mock_path fixture) is reported as failed
+    instead of aborting `reanonymize_all` and `rebuild_metadata_index`.
+    """
+    import shutil
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "mock_path"), tmp_path, dirs_exist_ok=True)
+    reader = ReportReader(report_root_path=str(tmp_path), metadata_index=True)
+    _write_working_report(reader, "a.pdf", "uuid-a", "Kopf\nGerät: GIF-HQ190\nBefund von Lux\n________________Fuss")
+
+    for workers in [None, 2]:
+        results = reader.reanonymize_all(verbose=False, workers=workers)
+        assert results["failed"]["fae55999-a55d-4f28-8358-b0893cdb3678"].startswith("JSONDecodeError")
+        assert "uuid-a" in results["written"] + results["unchanged"]
+    assert os.path.exists(reader.anonymization_fingerprints_path)
+
+    with pytest.warns(UserWarning, match="fae55999"):
+        reader.rebuild_metadata_index(verbose=False)
+    assert [meta["new_filename"] for meta in reader.query_reports(original_filename="a.pdf")] == ["uuid-a"]
+    reader.close()
+
+def test_get_lines_by_flags_single_scan():
+    """
+    Test that `get_lines_by_flags` returns the first line and offset per flag, supports the flags
+    dict from the settings and leaves out flags without a matching line.
+    """
+    from ..utils import get_lines_by_flags
+    from ..settings import DEFAULT_SETTINGS
+    text = "Kopf\nGerät: GIF-HQ190\nGerät: zweites\n1. Unters.: Dr. Lux\nBefund\n________________Fuss"
+
+    assert get_lines_by_flags(text, ["Gerät: ", "Patient: "], with_offsets=True) == {"Gerät: ": ("Gerät: GIF-HQ190", 5)}
+
+    lines = get_lines_by_flags(text, DEFAULT_SETTINGS["flags"])
+    assert lines == {
+        "endoscope_info_line": "Gerät: GIF-HQ190",
+        "examiner_info_line": "1. Unters.: Dr. Lux",
+        "cut_off_below": "________________Fuss",
+        "cut_off_above": "Gerät: GIF-HQ190",
+    }
+
+def test_extract_report_meta_with_registered_layout():
+    """
+    Test that `extract_report_meta` runs the extractors registered for a report layout, including
+    extractors for additional flags.
+    """
+    from ..extraction import extract_report_meta, FieldExtractor, register_extractor, normalize_date
+    from ..extraction.registry import EXTRACTORS
+    register_extractor(FieldExtractor("ward", "ward_info_line", r"Station: (?P<ward>\w+)"), layout="test_vendor")
+    register_extractor(
+        FieldExtractor(
+            "examination", "examiner_info_line", r"Untersucher: (?P<examiner_last_name>\w+) am (?P<date>[\d.]+)",
+            lambda match, **context: {"examiner_last_name": match.group("examiner_last_name"), "examination_date": normalize_date(match.group("date"))}
+        ),
+        layout="test_vendor"
+    )
+    text = "Station: ENDO2\nUntersucher: Lux am 09.06.2023\nGerät: GIF-HQ190"
+
+    try:
+        meta = extract_report_meta(
+            text, "Patient: ", "Gerät: ", "Untersucher: ", flags={"ward_info_line": "Station: "}, layout="test_vendor"
+        )
+    finally:
+        del EXTRACTORS["test_vendor"]
+
+    assert meta == {"ward": "ENDO2", "examiner_last_name": "Lux", "examination_date": "2023-06-09"}
+
+def test_extract_report_meta_tracing():
+    """
+    Test that metadata extraction is silent by default and sends per-field records to a configured sink.
+    """
+    from ..extraction import extract_report_meta
+    from ..tracing import configure_tracing
+    text = "Gerät: GIF-HQ190\n1. Unters.: Dr. med. Lux, Thomas U-datum: 09.06.2023 09:30"
+    records = []
+
+    with patch("sys.stderr") as mock_stderr:
+        extract_report_meta(text, "Patient: ", "Gerät: ", "1. Unters.:")
+        assert not mock_stderr.write.called
+
+    configure_tracing(sink=records.append)
+    try:
+        extract_report_meta(text, "Patient: ", "Gerät: ", "1. Unters.:")
+    finally:
+        configure_tracing(level=None)
+
+    assert [(record["extractor"], record["result"] is not None) for record in records] == [
+        ("patient", False), ("endoscope", True), ("examination", True)
+    ]
+    assert records[1]["result"] == {"endoscope": "GIF-HQ190"}
+
+def test_configure_tracing_closes_previous_sinks(tmp_path):
+    """
+    Test that reconfiguring or disabling tracing closes the file of a previously configured JSONL sink.
+    """
+    from ..tracing import configure_tracing
+    tracer = configure_tracing(sink=str(tmp_path / "trace.jsonl"))
+    try:
+        tracer.trace("first")
+        jsonl_sink = tracer.sinks[0]
+        trace_file = jsonl_sink._file
+
+        configure_tracing(sink=str(tmp_path / "other.jsonl"))
+        assert trace_file.closed and jsonl_sink._file is None
+        tracer.trace("second")
+    finally:
+        configure_tracing(level=None)
+
+    assert not tracer.sinks
+    assert [json.loads(line)["event"] for line in (tmp_path / "trace.jsonl").read_text().splitlines()] == ["first"]
+    assert [json.loads(line)["event"] for line in (tmp_path / "other.jsonl").read_text().splitlines()] == ["second"]
+
+SAMPLE_REPORT_TEXT = (
+    "Klinikum\n"
+    "Patient: Dietrich ,Jimmy Joe geb. 06.01.1983 Fallnummer: 0015744097\n"
+    "Gerät: GIF-HQ190\n"
+    "1. Unters.: Dr. med. Lux, Thomas U-datum: 09.06.2023 09:30\n"
+    "Befund: Unauffällige Schleimhaut bei Jimmy Joe Dietrich.\n"
+    "________________\n"
+    "Fusszeile"
+)
+
+def test_process_new_reports_timings_and_metrics(tmp_path):
+    """
+    Test that `process_new_reports` returns per-stage timing percentiles and writes them to a metrics file.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path))
+    for name in ["a.pdf", "b.pdf"]:
+        (tmp_path / "import" / "new" / name).write_bytes(b"%PDF-1.4")
+
+    with patch.object(ReportReader, "read_pdf", return_value=SAMPLE_REPORT_TEXT):
+        results = reader.process_new_reports(verbose=False, write_metrics=True)
+
+    assert len(results["processed"]) == 2
+    assert set(results["timings"]) == {
+        "claim", "read_pdf", "extract_report_meta", "anonymize_report",
+        "write_raw", "write_metadata", "write_anonymized", "move_to_imported"
+    }
+    assert results["timings"]["read_pdf"]["count"] == 2
+    assert results["timings"]["read_pdf"]["p50"] <= results["timings"]["read_pdf"]["p99"]
+
+    metrics_files = [name for name in os.listdir(tmp_path / "working") if name.startswith("metrics_")]
+    assert len(metrics_files) == 1
+    with open(tmp_path / "working" / metrics_files[0]) as f:
+        metrics = json.load(f)
+    assert metrics["processed"] == 2 and metrics["timings"] == results["timings"]
+
+def test_summarize_durations_percentiles():
+    """
+    Test the nearest-rank percentiles of the stage timing summary.
+    """
+    from ..timing import summarize_durations
+    summary = summarize_durations({"read_pdf": [float(i) for i in range(100, 0, -1)]})["read_pdf"]
+    assert (summary["count"], summary["p50"], summary["p95"], summary["p99"], summary["max"]) == (100, 50.0, 95.0, 99.0, 100.0)
+
+def test_process_new_reports_synthetic_corpus(tmp_path):
+    """
+    Test the full pipeline with a process pool on synthetic PDFs in the layout the settings flags expect.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    reader = ReportReader(report_root_path=str(tmp_path))
+    generate_corpus(reader.new_report_dir, 3, seed=1, text=False)
+
+    results = reader.process_new_reports(verbose=False, workers=2)
+
+    assert results["failed"] == {} and len(results["processed"]) == 3
+    for report_meta in results["processed"].values():
+        assert len(report_meta["casenumber"]) == 10
+        with open(reader.anonymized_report_dir + report_meta["new_filename"] + ".txt", encoding="utf-8") as f:
+            anonymized_text = f.read()
+        assert anonymized_text.startswith("Gerät: ")
+        # compare the full name, fake names are drawn from the same Faker name lists as the corpus
+        assert f"{report_meta['first_name']} {report_meta['last_name']}" not in anonymized_text
+        assert report_meta["casenumber"] not in anonymized_text
+    assert sorted(os.listdir(reader.imported_report_dir)) == ["report_00000.pdf", "report_00001.pdf", "report_00002.pdf"]
+
+def test_watch_processes_settled_reports_in_batches(tmp_path):
+    """
+    Test that watch mode (polling fallback) waits until a PDF's size stopped changing and processes
+    the arrived reports as one micro-batch.
+    """
+    import threading
+    import time
+    reader = ReportReader(report_root_path=str(tmp_path))
+    growing_pdf = tmp_path / "import" / "new" / "growing.pdf"
+    batches = []
+
+    def write_reports():
+        (tmp_path / "import" / "new" / "complete.pdf").write_bytes(b"%PDF-1.4 complete")
+        for i in range(5):
+            with open(growing_pdf, "ab") as f:
+                f.write(b"chunk")
+            time.sleep(0.05)
+
+    writer = threading.Thread(target=write_reports)
+    writer.start()
+    with patch.object(reader, "process_reports", side_effect=lambda batch, **kwargs: batches.append(sorted(batch)) or {"processed": {}, "skipped": [], "failed": {}}):
+        reader.watch(verbose=False, settle_time=0.2, poll_interval=0.02, batch_size=2, batch_window=10, use_inotify=False, max_batches=1)
+    writer.join()
+
+    assert batches == [[reader.new_report_dir + "complete.pdf", reader.new_report_dir + "growing.pdf"]]
+
+def test_faker_pool_reseed_gives_independent_fake_data():
+    """
+    Test that reseeding (done in every pool worker) breaks the random state inherited from the parent process.
+    """
+    import random
+    from ..anonymization import FakerPool
+    pool = FakerPool("de_DE")
+    state = (random.getstate(), pool.fake.random.getstate())
+
+    first = [pool.last_name() for _ in range(5)]
+    random.setstate(state[0])
+    pool.fake.random.setstate(state[1])
+    FakerPool.reseed()
+    assert [pool.last_name() for _ in range(5)] != first
+
+def test_run_pipeline_synthetic_corpus(tmp_path):
+    """
+    Test the asyncio pipeline with small queues on synthetic PDFs, including a report which fails to parse.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    reader = ReportReader(report_root_path=str(tmp_path))
+    generate_corpus(reader.new_report_dir, 5, seed=2, text=False)
+    (tmp_path / "import" / "new" / "broken.pdf").write_bytes(b"not a pdf")
+
+    results = reader.run_pipeline(verbose=False, workers=2, io_threads=2, queue_size=1)
+
+    assert len(results["processed"]) == 5
+    assert list(results["failed"]) == [reader.new_report_dir + "broken.pdf"]
+    assert len(os.listdir(reader.metadata_report_dir)) == 5
+    assert len(os.listdir(reader.imported_report_dir)) == 5
+    assert os.listdir(reader.report_in_progress_dir) == ["broken.pdf"]
+
+def test_jsonl_metadata_sink_with_workers(tmp_path):
+    """
+    Test that the jsonl metadata sink appends the metadata of all reports, including those processed
+    in pool workers, to a single file which re-anonymization reads back.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    reader = ReportReader(report_root_path=str(tmp_path), metadata_sink="jsonl")
+    generate_corpus(reader.new_report_dir, 4, seed=3, text=False)
+
+    results = reader.process_new_reports(verbose=False, workers=2)
+
+    assert os.listdir(reader.metadata_report_dir) == ["metadata.jsonl"]
+    records = list(reader.metadata_sink.iter_metadata())
+    assert sorted(record["new_filename"] for record in records) == sorted(
+        report_meta["new_filename"] for report_meta in results["processed"].values()
+    )
+    assert sorted(reader.reanonymize_all(verbose=False)["written"]) == sorted(record["new_filename"] for record in records)
+
+def test_jsonl_metadata_sink_flushes_on_timer(tmp_path):
+    """
+    Test that the jsonl metadata sink appends and fsyncs buffered records after fsync_interval
+    without a full batch, flush or close.
+    """
+    import time
+    from ..metadata_sinks import JsonlMetadataSink
+    sink = JsonlMetadataSink(str(tmp_path / "metadata.jsonl"), batch_size=100, fsync_interval=0.1)
+    sink.write({"new_filename": "uuid-a"})
+    assert list(sink.iter_metadata()) == []
+
+    deadline = time.monotonic() + 5
+    while not list(sink.iter_metadata()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert list(sink.iter_metadata()) == [{"new_filename": "uuid-a"}]
+    sink.close()
+
+def test_parquet_metadata_sink_round_trip(tmp_path):
+    """
+    Test that the parquet metadata sink writes buffered records to part files on flush and reads them back.
+    """
+    pytest.importorskip("pyarrow")
+    from ..metadata_sinks import create_metadata_sink
+    sink = create_metadata_sink("parquet", str(tmp_path))
+    sink.write({"new_filename": "uuid-a", "casenumber": "0015744097"})
+    sink.write({"new_filename": "uuid-b", "endoscope": "GIF-HQ190"})
+    assert list(sink.iter_metadata()) == []
+
+    sink.close()
+    assert list(sink.iter_metadata()) == [
+        {"new_filename": "uuid-a", "casenumber": "0015744097"},
+        {"new_filename": "uuid-b", "endoscope": "GIF-HQ190"},
+    ]
+    with pytest.raises(ValueError):
+        create_metadata_sink("csv", str(tmp_path))
+
+def test_incomplete_metadata_sink_fails_on_creation():
+    """
+    Test that a metadata sink missing one of the abstract methods can't be instantiated.
+    """
+    from ..metadata_sinks import MetadataSink
+
+    class WriteOnlySink(MetadataSink):
+        def write(self, report_meta):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnlySink()
+
+def test_incomplete_text_store_fails_on_creation():
+    """
+    Test that a text store missing one of the abstract methods can't be instantiated.
+    """
+    from ..text_store import TextStore
+
+    class AppendOnlyStore(TextStore):
+        def put(self, kind, name, text):
+            pass
+
+        def get(self, kind, name):
+            raise KeyError(name)
+
+        def iter_texts(self, kind):
+            return iter([])
+
+    with pytest.raises(TypeError):
+        AppendOnlyStore()
+
+def test_sqlite_text_store_process_and_migrate(tmp_path):
+    """
+    Test that the packed SQLite text store receives the raw and anonymized texts instead of .txt files,
+    and that existing text directories migrate into it.
+    """
+    from ..text_store import create_text_store, migrate_text_store
+    reader = ReportReader(report_root_path=str(tmp_path), text_store="sqlite")
+    (tmp_path / "import" / "new" / "a.pdf").write_bytes(b"%PDF-1.4")
+    with patch.object(ReportReader, "read_pdf", return_value=SAMPLE_REPORT_TEXT):
+        results = reader.process_new_reports(verbose=False)
+
+    new_filename = results["processed"][reader.new_report_dir + "a.pdf"]["new_filename"]
+    assert os.listdir(reader.raw_report_dir) == [] and os.listdir(reader.anonymized_report_dir) == []
+    assert reader.text_store.get("raw", new_filename) == SAMPLE_REPORT_TEXT
+    assert reader.text_store.get("anonymized", new_filename).startswith("Gerät: GIF-HQ190\n")
+
+    # a later report with the same original file name keeps its own raw text
+    other_text = SAMPLE_REPORT_TEXT.replace("0015744097", "0015744098")
+    (tmp_path / "import" / "new" / "a.pdf").write_bytes(b"%PDF-1.4")
+    with patch.object(ReportReader, "read_pdf", return_value=other_text):
+        results = reader.process_new_reports(verbose=False)
+    other_filename = results["processed"][reader.new_report_dir + "a.pdf"]["new_filename"]
+    assert other_filename != new_filename
+    assert reader.text_store.get("raw", new_filename) == SAMPLE_REPORT_TEXT
+    assert reader.text_store.get("raw", other_filename) == other_text
+    with pytest.raises(KeyError):
+        reader.text_store.get("raw", "missing")
+
+    files_reader = ReportReader(report_root_path=str(tmp_path))
+    _write_working_report(files_reader, "b.pdf", "uuid-b", "Kopf\nGerät: GIF-HQ190\nBefund\n________________Fuss")
+    counts = migrate_text_store(
+        create_text_store("files", reader.report_root_path + "/working"), reader.text_store, delete=True
+    )
+    assert counts == {"raw": 1, "anonymized": 0}
+    assert os.listdir(reader.raw_report_dir) == []
+    assert [name for name, _ in reader.text_store.iter_texts("raw")] == [new_filename, other_filename, "b"]
+    # the migrated raw text is found by its original name
+    assert sorted(reader.reanonymize_all(verbose=False)["written"]) == sorted([new_filename, other_filename, "uuid-b"])
+    reader.close()
+
+def test_metadata_index_query(tmp_path):
+    """
+    Test that processed reports are added to the SQLite metadata index and can be looked up by their
+    fields and examination date range, also after rebuilding the index from the metadata sink.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path), metadata_index=True)
+    (tmp_path / "import" / "new" / "a.pdf").write_bytes(b"%PDF-1.4")
+    with patch.object(ReportReader, "read_pdf", return_value=SAMPLE_REPORT_TEXT):
+        results = reader.process_new_reports(verbose=False)
+    report_meta = results["processed"][reader.new_report_dir + "a.pdf"]
+
+    assert reader.query_reports(casenumber="0015744097") == [report_meta]
+    assert reader.query_reports(endoscope="GIF-HQ190", examination_date_from="2023-06-01", examination_date_to="2023-06-30") == [report_meta]
+    assert reader.query_reports(examination_date_from="2023-06-10") == []
+    assert reader.metadata_index.get(report_meta["new_filename"]) == report_meta
+    with pytest.raises(ValueError):
+        reader.query_reports(diagnosis="Polyp")
+
+    _write_working_report(reader, "b.pdf", "uuid-b", "Kopf")
+    assert reader.rebuild_metadata_index(verbose=False) == 2
+    assert sorted(meta["new_filename"] for meta in reader.query_reports(endoscope="GIF-HQ190")) == sorted([report_meta["new_filename"], "uuid-b"])
+    reader.close()
+
+def test_deduplicate_by_file_hash_and_header_key(tmp_path):
+    """
+    Test that with deduplication, reports with the bytes or the header key of an imported report are moved
+    to imported with a link to the existing record, without reading their full text.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path), deduplicate=True)
+    other_text = SAMPLE_REPORT_TEXT.replace("09:30", "11:00")
+
+    def text_of(pdf_path, **kwargs):
+        return other_text if pdf_path.endswith("d.pdf") else SAMPLE_REPORT_TEXT
+
+    new_dir = tmp_path / "import" / "new"
+    (new_dir / "a.pdf").write_bytes(b"%PDF-1.4 a")
+    with patch.object(ReportReader, "read_pdf", side_effect=text_of), \
+         patch.object(ReportReader, "read_pdf_header", side_effect=text_of):
+        first = reader.process_new_reports(verbose=False)
+        original = first["processed"][reader.new_report_dir + "a.pdf"]["new_filename"]
+
+        (new_dir / "b.pdf").write_bytes(b"%PDF-1.4 a")
+        (new_dir / "c.pdf").write_bytes(b"%PDF-1.4 c")
+        (new_dir / "d.pdf").write_bytes(b"%PDF-1.4 d")
+        results = reader.process_new_reports(verbose=False, timings=True)
+
+        assert results["duplicates"] == {reader.new_report_dir + "b.pdf": original, reader.new_report_dir + "c.pdf": original}
+        assert list(results["processed"]) == [reader.new_report_dir + "d.pdf"]
+        assert ReportReader.read_pdf.call_count == 2
+    assert results["timings"]["dedupe"]["count"] == 3
+    assert sorted(os.listdir(reader.imported_report_dir)) == ["a.pdf", "b.pdf", "c.pdf", "d.pdf"]
+    assert len(os.listdir(reader.metadata_report_dir)) == 2
+    assert sorted(row[:2] for row in reader.dedupe_index.duplicates()) == [("b.pdf", original), ("c.pdf", original)]
+
+def test_run_pipeline_deduplicates_copies(tmp_path):
+    """
+    Test that the asyncio pipeline detects a renamed copy of an imported report in its claim stage.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    reader = ReportReader(report_root_path=str(tmp_path), deduplicate=True)
+    generate_corpus(reader.new_report_dir, 2, seed=4, text=False)
+    results = reader.run_pipeline(verbose=False, workers=2, io_threads=2)
+    assert len(results["processed"]) == 2 and results["duplicates"] == {}
+
+    (tmp_path / "import" / "new" / "copy.pdf").write_bytes((tmp_path / "import" / "imported" / "report_00000.pdf").read_bytes())
+    results = reader.run_pipeline(verbose=False, workers=2, io_threads=2)
+    assert results["processed"] == {}
+    assert list(results["duplicates"]) == [reader.new_report_dir + "copy.pdf"]
+
+@pytest.mark.parametrize("mode", ["pool", "pipeline"])
+def test_deduplicate_copies_in_the_same_batch(tmp_path, mode):
+    """
+    Test that of two identical reports processed in parallel in the same batch, one is imported and the
+    other is detected as its duplicate.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    reader = ReportReader(report_root_path=str(tmp_path), deduplicate=True)
+    generate_corpus(reader.new_report_dir, 1, seed=8, text=False)
+    (tmp_path / "import" / "new" / "copy.pdf").write_bytes((tmp_path / "import" / "new" / "report_00000.pdf").read_bytes())
+
+    if mode == "pool":
+        results = reader.process_new_reports(verbose=False, workers=2)
+    else:
+        results = reader.run_pipeline(verbose=False, workers=2, io_threads=2)
+
+    assert len(results["processed"]) == 1 and len(results["duplicates"]) == 1
+    [report_meta] = results["processed"].values()
+    assert list(results["duplicates"].values()) == [report_meta["new_filename"]]
+    assert len(os.listdir(reader.imported_report_dir)) == 2
+
+def test_failed_report_releases_dedupe_reservation(tmp_path):
+    """
+    Test that a report which fails after being reserved in the dedupe index does not turn a later copy into a duplicate.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path), deduplicate=True)
+    new_dir = tmp_path / "import" / "new"
+    (new_dir / "a.pdf").write_bytes(b"%PDF-1.4 a")
+    with patch.object(ReportReader, "read_pdf_header", return_value=SAMPLE_REPORT_TEXT), \
+         patch.object(ReportReader, "read_pdf", side_effect=RuntimeError("broken")):
+        assert list(reader.process_new_reports(verbose=False)["failed"]) == [reader.new_report_dir + "a.pdf"]
+
+    (new_dir / "b.pdf").write_bytes(b"%PDF-1.4 a")
+    with patch.object(ReportReader, "read_pdf_header", return_value=SAMPLE_REPORT_TEXT), \
+         patch.object(ReportReader, "read_pdf", return_value=SAMPLE_REPORT_TEXT):
+        results = reader.process_new_reports(verbose=False)
+    assert list(results["processed"]) == [reader.new_report_dir + "b.pdf"] and results["duplicates"] == {}
+
+def test_empty_inbox_run_does_not_import_heavy_modules():
+    """
+    Test that importing report_reader, building a ReportReader and processing an empty inbox in a fresh
+    interpreter never imports faker, gender_guesser or pdfplumber.
+    """
+    from ..benchmarks.bench_startup import run
+    assert run(repeat=1)["heavy_modules"] == []
+
+def test_faker_pool_builds_faker_on_first_use():
+    """
+    Test that FakerPool only builds its Faker instance once fake data is requested.
+    """
+    from ..anonymization import FakerPool
+    FakerPool._fakers.pop("fr_FR", None)
+    pool = FakerPool("fr_FR", buffer_size=2)
+    assert "fr_FR" not in FakerPool._fakers
+    pool.last_name()
+    assert "fr_FR" in FakerPool._fakers
+
+def test_journal_recovers_reports_of_crashed_process(tmp_path):
+    """
+    Test that on start-up with the journal enabled, reports left in import/tmp by a dead process are
+    moved on if their outputs were written and rolled back to import/new otherwise.
+    """
+    import subprocess
+    import sys
+    from ..journal import ProcessingJournal, _process_run_id
+    crashed = subprocess.Popen([sys.executable, "-c", "pass"])
+    crashed.wait()
+
+    reader = ReportReader(report_root_path=str(tmp_path))
+    for name in ["a.pdf", "b.pdf", "c.pdf"]:
+        (tmp_path / "import" / "tmp" / name).write_bytes(b"%PDF-1.4")
+    (tmp_path / "import" / "new" / "d.pdf").write_bytes(b"%PDF-1.4")
+    (tmp_path / "working" / "anonymized" / "uuid-b.txt").write_text("partial")
+    (tmp_path / "working" / "metadata" / "uuid-b.json").write_text("{}")
+
+    journal = ProcessingJournal(str(tmp_path / "working" / "journal.sqlite"))
+    for name, stage, new_filename in [("a.pdf", "written", "uuid-a"), ("b.pdf", "parsed", "uuid-b"), ("c.pdf", "claimed", None), ("d.pdf", "claimed", None)]:
+        journal.db.execute("INSERT INTO entries VALUES (?, ?, ?, ?, 'crashed', 0)", (name, stage, new_filename, crashed.pid))
+    journal.db.execute("INSERT INTO entries VALUES ('e.pdf', 'parsed', 'uuid-e', ?, ?, 0)", (os.getppid(), _process_run_id(os.getppid())))
+    journal.close()
+
+    reader = ReportReader(report_root_path=str(tmp_path), journal=True)
+
+    assert os.listdir(reader.imported_report_dir) == ["a.pdf"]
+    assert sorted(os.listdir(reader.new_report_dir)) == ["b.pdf", "c.pdf", "d.pdf"]
+    assert os.listdir(reader.anonymized_report_dir) == [] and os.listdir(reader.metadata_report_dir) == []
+    assert [row[0] for row in reader.journal.db.execute("SELECT filename FROM entries")] == ["e.pdf"]
+
+def test_journal_keeps_entries_of_live_processes(tmp_path):
+    """
+    Test that a process losing the claim of a report neither replaces nor removes the journal entry of the
+    live process holding it, and that an entry whose pid was reused by another process counts as dead.
+    """
+    import subprocess
+    import sys
+    from ..journal import _process_run_id
+    reader = ReportReader(report_root_path=str(tmp_path), journal=True)
+    (tmp_path / "import" / "new" / "a.pdf").write_bytes(b"%PDF-1.4")
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    try:
+        reader.journal.db.execute(
+            "INSERT INTO entries VALUES ('a.pdf', 'claimed', NULL, ?, ?, 0)", (live.pid, _process_run_id(live.pid))
+        )
+        with pytest.raises(FileNotFoundError):
+            reader.move_report_to_in_progress(reader.new_report_dir + "a.pdf")
+        reader.journal.finish("a.pdf")
+        assert reader.journal.db.execute("SELECT pid FROM entries") == [(live.pid,)]
+        assert reader.journal.unfinished() == []
+
+        # the same pid in an earlier boot (or before the pid was reused) is a different process
+        reader.journal.db.execute("UPDATE entries SET run_id = 'earlier-boot/1'")
+        assert [entry["filename"] for entry in reader.journal.unfinished()] == ["a.pdf"]
+        assert reader.move_report_to_in_progress(reader.new_report_dir + "a.pdf") == reader.report_in_progress_dir + "a.pdf"
+    finally:
+        live.kill()
+        live.wait()
+
+def test_journal_processing_leaves_no_entries(tmp_path):
+    """
+    Test that with the journal enabled, processed and failed reports are removed from the journal and
+    failed reports stay in import/tmp.
+    """
+    reader = ReportReader(report_root_path=str(tmp_path), journal=True)
+    (tmp_path / "import" / "new" / "a.pdf").write_bytes(b"%PDF-1.4")
+    (tmp_path / "import" / "new" / "broken.pdf").write_bytes(b"%PDF-1.4")
+
+    def text_of(pdf_path):
+        if pdf_path.endswith("broken.pdf"):
+            raise ValueError("broken")
+        return SAMPLE_REPORT_TEXT
+
+    with patch.object(ReportReader, "read_pdf", side_effect=text_of):
+        results = reader.process_new_reports(verbose=False)
+
+    assert list(results["processed"]) == [reader.new_report_dir + "a.pdf"]
+    assert list(results["failed"]) == [reader.new_report_dir + "broken.pdf"]
+    assert reader.journal.db.execute("SELECT COUNT(*) FROM entries") == [(0,)]
+    assert os.listdir(reader.report_in_progress_dir) == ["broken.pdf"]
+    assert not [name for name in os.listdir(reader.anonymized_report_dir) if name.endswith(".tmp")]
+
+def test_read_pdf_in_parallel_page_ranges(tmp_path):
+    """
+    Test that long PDFs read in parallel page ranges give the same text as the serial path, and that
+    PDFs below the page threshold are read serially.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    from ..pdf_reader import page_ranges, read_pdf_text
+    assert page_ranges(7, 3) == [(0, 3), (3, 5), (5, 7)]
+    assert page_ranges(2, 4) == [(0, 1), (1, 2)]
+
+    generate_corpus(str(tmp_path / "corpus"), 1, pages=5, seed=5, text=False)
+    pdf_path = str(tmp_path / "corpus" / "report_00000.pdf")
+    reader = ReportReader(report_root_path=str(tmp_path), page_workers=3, page_chunk_min_pages=4)
+    try:
+        assert reader.read_pdf(pdf_path) == read_pdf_text(pdf_path)
+        assert reader._page_executor is not None
+        with patch.object(reader._page_executor, "submit") as mock_submit:
+            reader.page_chunk_min_pages = 6
+            reader.read_pdf(pdf_path)
+        mock_submit.assert_not_called()
+    finally:
+        reader.close()
+
+@pytest.mark.parametrize("backend", ["pdfminer", "pypdf", "pdfium"])
+def test_text_backends_match_pdfplumber(tmp_path, backend):
+    """
+    Test that every text backend gives the same report metadata (and header) as pdfplumber on the synthetic corpus.
+    """
+    from ..benchmarks.corpus import generate_corpus
+    if backend == "pypdf":
+        pytest.importorskip("pypdf")
+    generate_corpus(str(tmp_path / "corpus"), 3, pages=2, seed=6, text=False)
+    reference = ReportReader(report_root_path=str(tmp_path))
+    reader = ReportReader(report_root_path=str(tmp_path), text_backend=backend)
+
+    for name in sorted(os.listdir(tmp_path / "corpus")):
+        pdf_path = str(tmp_path / "corpus" / name)
+        expected = reference.extract_report_meta(reference.read_pdf(pdf_path), pdf_path)
+        report_meta = reader.extract_report_meta(reader.read_pdf(pdf_path), pdf_path)
+        expected.pop("new_filename"), report_meta.pop("new_filename")
+        assert report_meta == expected
+        assert reader.read_pdf_header(pdf_path) == reference.read_pdf_header(pdf_path)
+
+    with pytest.raises(ValueError):
+        ReportReader(report_root_path=str(tmp_path), text_backend="ocr")
+
+def test_incomplete_text_backend_fails_on_creation():
+    """
+    Test that a text backend missing one of the abstract methods can't be instantiated.
+    """
+    from ..pdf_reader import PdfTextBackend
+
+    class PagelessBackend(PdfTextBackend):
+        def open(self, source):
+            return open(source, "rb")
+
+        def iter_page_texts(self, document, max_pages = None, first_page = 0):
+            yield document.read().decode()
+
+    with pytest.raises(TypeError):
+        PagelessBackend()
+
+@pytest.mark.parametrize("backend", ["pdfplumber", "pdfminer", "pdfium"])
+def test_process_bytes_in_memory(tmp_path, backend):
+    """
+    Test that process_bytes reads reports from bytes, file-like objects and mmap buffers like from a path,
+    without touching the inbox folders.
+    """
+    import io
+    import mmap
+    from ..benchmarks.corpus import generate_corpus
+    generate_corpus(str(tmp_path / "corpus"), 1, pages=2, seed=7, text=False)
+    pdf_path = str(tmp_path / "corpus" / "report_00000.pdf")
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    reader = ReportReader(report_root_path=str(tmp_path), text_backend=backend, text_cache=True)
+    expected = reader.read_pdf(pdf_path)
+
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for source in [data, bytearray(data), memoryview(data), io.BytesIO(data), buffer]:
+            text, report_meta, anonymized_text = reader.process_bytes(source, filename="queued.pdf")
+            assert text == expected
+            assert report_meta["original_filename"] == "queued.pdf"
+            assert report_meta["casenumber"] and report_meta["casenumber"] not in anonymized_text
+        assert reader.read_pdf_header(buffer) == reader.read_pdf_header(pdf_path)
+
+    for directory in [reader.new_report_dir, reader.report_in_progress_dir, reader.imported_report_dir]:
+        assert os.listdir(directory) == []
+    with pytest.raises(TypeError):
+        reader.read_pdf(42)
+
+def test_read_pdf_from_non_byte_buffer(tmp_path):
+    """
+    Test that buffers with items wider than a byte are read by byte offsets, like the bytes they hold.
+    """
+    from array import array
+    from ..benchmarks.corpus import generate_corpus
+    from ..pdf_reader import BufferReader
+    generate_corpus(str(tmp_path / "corpus"), 1, pages=2, seed=7, text=False)
+    pdf_path = str(tmp_path / "corpus" / "report_00000.pdf")
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    # trailing whitespace after %%EOF is ignored, it just makes the size a multiple of the item size
+    data += b"\n" * (-len(data) % 4)
+    reader = ReportReader(report_root_path=str(tmp_path))
+    expected = reader.read_pdf(pdf_path)
+
+    words = array("H")
+    words.frombytes(data)
+    for source in [words, memoryview(data).cast("I")]:
+        stream = BufferReader(source)
+        assert stream.seek(0, os.SEEK_END) == len(data)
+        stream.seek(0)
+        assert stream.read() == data
+        assert reader.read_pdf(source) == expected
+        assert reader.read_report_text(pdf_path, data=source) == expected
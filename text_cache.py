@@ -0,0 +1,107 @@
+import os
+import time
+
+class TextCache:
+    '''
+    On-disk cache of extracted PDF texts, keyed by the SHA-256 hex digest of the PDF bytes (prefixed with the \
+    name of the text backend by ReportReader).
+    Each entry is stored as <key>.txt inside cache_dir. Entries older than max_age are ignored and removed,
+    and once the cache grows beyond max_bytes the least recently used entries are evicted.
+
+    Attributes:
+        cache_dir (str): Directory containing the cached texts.
+        max_bytes (int): Maximum total size of the cached texts in bytes. None means no limit.
+        max_age (float): Maximum age of an entry in seconds. None means entries never expire.
+    '''
+
+    def __init__(self, cache_dir, max_bytes = None, max_age = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Total size of the cache, determined on the first write
+        self._size = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".txt")
+
+    def _is_expired(self, mtime, now):
+        return self.max_age is not None and now - mtime > self.max_age
+
+    def get(self, key):
+        '''
+        Returns the cached text for the given key, or None if there is no (unexpired) entry.
+        A hit refreshes the entry's modification time, which is used as last access time for eviction.
+        '''
+        path = self._path(key)
+        try:
+            mtime = os.path.getmtime(path)
+            if self._is_expired(mtime, time.time()):
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return text
+
+    def put(self, key, text):
+        '''
+        Stores the text for the given key and evicts old entries if the cache is too large.
+        '''
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self.evict()
+        else:
+            # other processes sharing the cache directory may have evicted the entry already
+            try:
+                self._size += os.path.getsize(path)
+            except FileNotFoundError:
+                return
+            if self.max_bytes is not None and self._size > self.max_bytes:
+                self.evict()
+
+    def _remove(self, path, size = None):
+        # entries may be removed concurrently by other processes sharing the cache directory
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        if self._size is not None and size is not None:
+            self._size -= size
+
+    def evict(self):
+        '''
+        Removes expired entries, then the least recently used entries until the cache fits into max_bytes.
+        '''
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".txt"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if self._is_expired(stat.st_mtime, now):
+                self._remove(entry.path, stat.st_size)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        self._size = sum(size for _, size, _ in entries)
+        if self.max_bytes is None:
+            return
+
+        for _, size, path in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path, size)
@@ -0,0 +1,229 @@
+'''
+Storage of the raw and anonymized report texts.
+
+By default every text is its own file in working/raw/ (keyed by the original file name) and working/anonymized/
+(keyed by new_filename). The packed SQLite store keeps all texts zlib-compressed in working/texts.sqlite instead,
+with random access by key and sequential scans in insertion order. It keys raw texts by new_filename as well, so
+reports with the same original file name don't replace each other's raw text.
+
+Existing directories can be migrated into the packed store with:
+    python -m agl_report_reader.text_store REPORT_ROOT_PATH [--delete]
+'''
+from abc import ABC, abstractmethod
+import os
+import zlib
+from .sqlite_db import SqliteDatabase
+from .utils import write_text_atomic
+
+# Kinds of texts stored per report
+TEXT_KINDS = ["raw", "anonymized"]
+
+class TextStore(ABC):
+    '''
+    Base class of the stores for report texts. Texts are addressed by their kind ("raw" or "anonymized") \
+    and a name, the new_filename for anonymized texts and the name returned by raw_name for raw texts.
+    '''
+
+    def raw_name(self, original_filename, new_filename):
+        '''
+        Returns the name the raw text of a report is stored under, by default the original file name \
+        without extension.
+        '''
+        return os.path.splitext(original_filename)[0]
+
+    @abstractmethod
+    def put(self, kind, name, text):
+        '''
+        Stores a text, replacing an existing text of the same kind and name.
+        '''
+
+    @abstractmethod
+    def get(self, kind, name):
+        '''
+        Returns the stored text, raises KeyError if there is none.
+        '''
+
+    @abstractmethod
+    def delete(self, kind, name):
+        '''
+        Removes a text if it exists.
+        '''
+
+    @abstractmethod
+    def iter_texts(self, kind):
+        '''
+        Yields (name, text) tuples of all stored texts of the given kind.
+        '''
+
+    def close(self):
+        pass
+
+class DirectoryTextStore(TextStore):
+    '''
+    Stores each text as <directory>/<name>.txt, with one directory per kind (the default layout). \
+    With atomic, texts are written to a temporary file which then replaces the target.
+    '''
+
+    def __init__(self, directories, atomic = False):
+        self.directories = directories
+        self.atomic = atomic
+
+    def _path(self, kind, name):
+        return os.path.join(self.directories[kind], name + ".txt")
+
+    def put(self, kind, name, text):
+        if self.atomic:
+            write_text_atomic(self._path(kind, name), text)
+            return
+        with open(self._path(kind, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def delete(self, kind, name):
+        try:
+            os.remove(self._path(kind, name))
+        except FileNotFoundError:
+            pass
+
+    def get(self, kind, name):
+        try:
+            with open(self._path(kind, name), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(f"No {kind} text '{name}'.") from None
+
+    def names(self, kind):
+        return [entry.name[:-len(".txt")] for entry in os.scandir(self.directories[kind]) if entry.name.endswith(".txt")]
+
+    def iter_texts(self, kind):
+        for name in self.names(kind):
+            yield name, self.get(kind, name)
+
+class SqliteTextStore(TextStore):
+    '''
+    Stores all texts zlib-compressed in a single SQLite database, see SqliteDatabase. Raw texts are \
+    stored under the report's new_filename; raw texts migrated from the directories keep their original name.
+    '''
+
+    def __init__(self, path, compression_level = 6):
+        self.path = path
+        self.compression_level = compression_level
+        self.db = SqliteDatabase(path, [
+            "CREATE TABLE IF NOT EXISTS texts (kind TEXT NOT NULL, name TEXT NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (kind, name))"
+        ])
+
+    def raw_name(self, original_filename, new_filename):
+        return new_filename
+
+    def put(self, kind, name, text):
+        self.put_many([(kind, name, text)])
+
+    def put_many(self, items):
+        '''
+        Stores many (kind, name, text) tuples in a single transaction.
+        '''
+        self.db.executemany(
+            "INSERT OR REPLACE INTO texts (kind, name, data) VALUES (?, ?, ?)",
+            [(kind, name, zlib.compress(text.encode("utf-8"), self.compression_level)) for kind, name, text in items]
+        )
+
+    def get(self, kind, name):
+        rows = self.db.execute("SELECT data FROM texts WHERE kind = ? AND name = ?", (kind, name))
+        if not rows:
+            raise KeyError(f"No {kind} text '{name}'.")
+        return zlib.decompress(rows[0][0]).decode("utf-8")
+
+    def delete(self, kind, name):
+        self.db.execute("DELETE FROM texts WHERE kind = ? AND name = ?", (kind, name))
+
+    def iter_texts(self, kind, page_size = 1000):
+        # scan in pages of rowids, so the database is not locked while the caller consumes the texts
+        last_rowid = 0
+        while True:
+            rows = self.db.execute(
+                "SELECT rowid, name, data FROM texts WHERE kind = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (kind, last_rowid, page_size)
+            )
+            if not rows:
+                return
+            for last_rowid, name, data in rows:
+                yield name, zlib.decompress(data).decode("utf-8")
+
+    def close(self):
+        self.db.close()
+
+# Text stores selectable by name, see create_text_store
+TEXT_STORES = ["files", "sqlite"]
+
+def create_text_store(kind, working_dir, atomic = False):
+    '''
+    Creates the text store of the given kind below working_dir:
+        - "files": one .txt per text in working/raw/ and working/anonymized/ (default), written atomically if atomic is set.
+        - "sqlite": packed, compressed texts in working/texts.sqlite.
+    '''
+    if kind == "files":
+        return DirectoryTextStore({
+            "raw": os.path.join(working_dir, "raw/"),
+            "anonymized": os.path.join(working_dir, "anonymized/"),
+        }, atomic = atomic)
+    if kind == "sqlite":
+        return SqliteTextStore(os.path.join(working_dir, "texts.sqlite"))
+    raise ValueError(f"Unknown text store '{kind}', expected one of {TEXT_STORES}.")
+
+def migrate_text_store(source, target, delete = False, batch_size = 500):
+    """
+    Copies all texts of a text store into another one, e.g. from the directories into the packed SQLite store.
+
+    Parameters:
+    - source: TextStore to read the texts from.
+    - target: TextStore to write the texts to.
+    - delete: bool, remove the migrated .txt files afterwards if source is a DirectoryTextStore.
+    - batch_size: int, number of texts written per transaction if the target supports put_many.
+
+    Returns:
+    - dict: Number of migrated texts per kind.
+    """
+    counts = {}
+    for kind in TEXT_KINDS:
+        counts[kind] = 0
+        batch = []
+        for name, text in source.iter_texts(kind):
+            batch.append((kind, name, text))
+            if len(batch) >= batch_size:
+                _put_batch(target, batch)
+                counts[kind] += len(batch)
+                batch = []
+        _put_batch(target, batch)
+        counts[kind] += len(batch)
+
+    if delete and isinstance(source, DirectoryTextStore):
+        for kind in TEXT_KINDS:
+            for name in source.names(kind):
+                target.get(kind, name) # raises KeyError if the text did not arrive
+                os.remove(source._path(kind, name))
+    return counts
+
+def _put_batch(target, batch):
+    if not batch:
+        return
+    if hasattr(target, "put_many"):
+        target.put_many(batch)
+    else:
+        for kind, name, text in batch:
+            target.put(kind, name, text)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Migrate the raw and anonymized report texts into the packed SQLite store.")
+    parser.add_argument("report_root_path")
+    parser.add_argument("--delete", action="store_true", help="remove the migrated .txt files")
+    args = parser.parse_args()
+
+    working_dir = os.path.join(args.report_root_path, "working")
+    target = create_text_store("sqlite", working_dir)
+    counts = migrate_text_store(create_text_store("files", working_dir), target, delete = args.delete)
+    target.close()
+    print(f"Migrated {counts['raw']} raw and {counts['anonymized']} anonymized texts to {target.path}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from contextlib import contextmanager, nullcontext
+import math
+import time
+
+class StageTimer:
+    '''
+    Collects the durations of named processing stages, e.g. of ReportReader.process_report.
+    Each use of stage(name) adds one duration (in seconds) to the stage's list.
+
+    Example:
+    ```
+    timer = StageTimer()
+    with timer.stage("read_pdf"):
+        text = reader.read_pdf(pdf_path)
+    timer.summary()
+    # Output: {'read_pdf': {'count': 1, 'total': 0.12, 'mean': 0.12, 'p50': 0.12, 'p95': 0.12, 'p99': 0.12, 'max': 0.12}}
+    ```
+    '''
+    enabled = True
+
+    def __init__(self):
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    def merge(self, durations):
+        '''
+        Adds the durations of another timer (a dict mapping stage names to lists of durations).
+        '''
+        for name, values in durations.items():
+            self.durations.setdefault(name, []).extend(values)
+
+    def summary(self):
+        return summarize_durations(self.durations)
+
+class NullTimer:
+    '''
+    Timer used when timing is disabled. stage() returns a shared no-op context manager.
+    '''
+    enabled = False
+    durations = {}
+
+    _context = nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+NULL_TIMER = NullTimer()
+
+def percentile(sorted_values, q):
+    '''
+    Returns the q-th percentile (0-100) of an ascending list of values, using the nearest-rank method.
+    '''
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize_durations(durations):
+    '''
+    Summarizes lists of stage durations into count, total, mean, p50, p95, p99 and max per stage.
+
+    Args:
+        durations (dict): Maps stage names to lists of durations in seconds.
+
+    Returns:
+        dict: Maps stage names to their summary statistics.
+    '''
+    summary = {}
+    for name, values in durations.items():
+        if not values:
+            continue
+        values = sorted(values)
+        total = sum(values)
+        summary[name] = {
+            "count": len(values),
+            "total": total,
+            "mean": total / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+        }
+    return summary
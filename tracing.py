@@ -0,0 +1,111 @@
+import json
+import logging
+import sys
+import time
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+
+class Tracer:
+    '''
+    Level-gated tracing hook for debugging the processing pipeline, e.g. the per-field results of the
+    metadata extraction. A tracer is disabled unless it has a level and at least one sink, and callers check
+    tracer.enabled before building a trace record, so disabled tracing costs a single attribute lookup.
+
+    Sinks are callables receiving each record as dictionary, e.g. a JsonlSink or any callback.
+
+    Attributes:
+        level (int): Minimum level of the records passed to the sinks, None disables the tracer.
+        sinks (List[callable]): Callables receiving the trace records.
+        enabled (bool): True if records of at least the tracer's level reach a sink.
+    '''
+
+    def __init__(self, level = None, sinks = None):
+        self.sinks = list(sinks or [])
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.enabled = level is not None and bool(self.sinks)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        self.set_level(self.level)
+
+    def clear(self):
+        '''
+        Removes all sinks, disabling the tracer.
+        '''
+        self.sinks = []
+        self.set_level(self.level)
+
+    def close(self):
+        '''
+        Closes the sinks that have a close method, e.g. the file of a JsonlSink, and removes all sinks.
+        '''
+        for sink in self.sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+        self.clear()
+
+    def trace(self, event, level = DEBUG, **fields):
+        '''
+        Passes a record with the event name and the given fields to all sinks, if level is high enough.
+        '''
+        if not self.enabled or level < self.level:
+            return
+
+        record = {"time": time.time(), "level": logging.getLevelName(level), "event": event}
+        record.update(fields)
+        for sink in self.sinks:
+            sink(record)
+
+class JsonlSink:
+    '''
+    Trace sink appending each record as one JSON line to a file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __call__(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def stderr_sink(record):
+    '''
+    Trace sink printing each record as JSON to stderr.
+    '''
+    print(json.dumps(record, ensure_ascii=False, default=str), file=sys.stderr)
+
+# Process-wide tracer, disabled by default
+TRACER = Tracer()
+
+# Tracer used for verbose=True, printing debug records to stderr
+VERBOSE_TRACER = Tracer(DEBUG, [stderr_sink])
+
+def get_tracer():
+    return TRACER
+
+def configure_tracing(level = DEBUG, sink = None):
+    '''
+    Enables the process-wide tracer at the given level. sink may be a callable or the path of a JSONL file,
+    if None, records are printed to stderr. Call with level=None to disable tracing again.
+    The previously configured sinks are closed.
+    '''
+    TRACER.close()
+    if level is not None:
+        if sink is None:
+            sink = stderr_sink
+        elif isinstance(sink, str):
+            sink = JsonlSink(sink)
+        TRACER.add_sink(sink)
+    TRACER.set_level(level)
+    return TRACER
@@ -1,48 +1,199 @@
-import gender_guesser.detector as gender
+from functools import lru_cache
+import hashlib
+import os
 import random
 import re
+import string
+from .settings import DEFAULT_SETTINGS
 
-def determine_gender(first_name, detector):
+# Shared gender detector, loaded on first use by get_gender_detector
+_gender_detector = None
+
+def get_gender_detector():
+    '''
+    Returns the shared gender detector. Building a detector parses the whole gender_guesser \
+    name dictionary, so gender_guesser is only imported and the detector built once per process, on first use.
+    '''
+    global _gender_detector
+    if _gender_detector is None:
+        import gender_guesser.detector as gender
+        _gender_detector = gender.Detector(case_sensitive = True)
+    return _gender_detector
+
+def _get_gender(first_name, detector):
+    return detector.get_gender(first_name, "germany")
+
+_cached_get_gender = lru_cache(maxsize = DEFAULT_SETTINGS["gender_cache_size"])(_get_gender)
+
+def set_gender_cache_size(maxsize):
+    '''
+    Replaces the first name -> gender memo with an empty one of the given size. \
+    A maxsize of None makes the memo unbounded, 0 disables it.
+    '''
+    global _cached_get_gender
+    _cached_get_gender = lru_cache(maxsize = maxsize)(_get_gender)
+
+def determine_gender(first_name, detector = None):
     '''
     The result will be one of unknown (name not found), andy (androgynous), male, female, mostly_male, or mostly_female. \
     The difference between andy and unknown is that the former is found to have the same probability \
     to be male than to be female, while the later means that the name wasn't found in the database.
+    If no detector is given, the shared detector from get_gender_detector is used. Results are memoized per detector.
     '''
-    d = gender.Detector()
-    country = "germany"
+    if detector is None:
+        detector = get_gender_detector()
 
-    return d.get_gender(first_name, country)
+    return _cached_get_gender(first_name, detector)
 
 # get the line starting with PATIENT_INFO_LINE_FLAG
 def get_line_by_flag(text, flag):
     for line in text.split("\n"):
         if line.startswith(flag):
             return line
+
+def get_lines_by_flags(text, flags, with_offsets = False):
+    """
+    Finds the first line starting with each of the given flags in a single scan of the text.
+    The scan stops as soon as a line was found for every flag, so the cost does not grow with the number of flags.
+    
+    Parameters:
+    - text: str
+        The text to search.
+    - flags: Iterable[str] or dict
+        The flags to search for. A dict maps names to a flag or a list of flags (e.g. DEFAULT_SETTINGS["flags"]);
+        the result is then keyed by name, and for a list the first line starting with any of its flags is used.
+    - with_offsets: bool, optional
+        If True, each result is a tuple of the line and its character offset in the text (default is False).
+        
+    Returns:
+    - dict: Maps each flag (or name) to its first matching line. Flags without a matching line are missing.
+    
+    Example:
+    ```
+    get_lines_by_flags("Patient: Doe\nGerät: GIF", ["Gerät: ", "Patient: "])
+    # Output: {'Patient: ': 'Patient: Doe', 'Gerät: ': 'Gerät: GIF'}
+    ```
+    """
+    if isinstance(flags, dict):
+        keyed_flags = [
+            (key, flag)
+            for key, value in flags.items()
+            for flag in ([value] if isinstance(value, str) else value)
+        ]
+    else:
+        keyed_flags = [(flag, flag) for flag in flags]
+
+    found = {}
+    prefixes = tuple(flag for _, flag in keyed_flags)
+    start = 0
+    while prefixes and start <= len(text):
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+
+        if text.startswith(prefixes, start, end):
+            line = text[start:end]
+            for key, flag in keyed_flags:
+                if key not in found and line.startswith(flag):
+                    found[key] = (line, start) if with_offsets else line
+            keyed_flags = [(key, flag) for key, flag in keyed_flags if key not in found]
+            prefixes = tuple(flag for _, flag in keyed_flags)
+
+        start = end + 1
+
+    return found
         
-def replace_large_numbers(text):
+# Numbers with at least 5 digits, e.g. case numbers or patient IDs
+LARGE_NUMBER_PATTERN = re.compile(r'\b\d{5,}\b')
+
+def random_number(n):
+    """
+    Generates a random number with 'n' digits (leading zeros allowed) as string.
+    """
+    return ''.join(random.choices(string.digits, k=n))
+
+def replace_large_numbers(text, consistent = True):
     """
     Replaces all numbers with at least 5 digits in the given text with random numbers of the same length.
+    The text is scanned once, replacements are never replaced again.
     
     Parameters:
     - text: str
         The original text containing numbers.
+    - consistent: bool, optional
+        If True, repeated occurrences of the same number (e.g. a case number) get the same random number.
+        If False, every occurrence gets its own random number (default is True).
         
     Returns:
     - new_text: str
         The text with numbers replaced.
     """
+    replacements = {}
+
+    def substitute(match):
+        number = match.group(0)
+        if not consistent:
+            return random_number(len(number))
+        if number not in replacements:
+            replacements[number] = random_number(len(number))
+        return replacements[number]
+
+    return LARGE_NUMBER_PATTERN.sub(substitute, text)
+
+
+def hash_file(path, chunk_size = 1024 * 1024):
+    """
+    Computes the SHA-256 hex digest of a file's bytes, reading it in chunks.
     
-    # Define a function to generate a random number with 'n' digits
-    def random_number(n):
-        return ''.join([str(random.randint(0, 9)) for _ in range(n)])
-    
-    # Find all numbers with at least 5 digits
-    numbers_to_replace = re.findall(r'\b\d{5,}\b', text)
+    Parameters:
+    - path: str
+        Path to the file.
+    - chunk_size: int, optional
+        Number of bytes read at once (default is 1 MiB).
+        
+    Returns:
+    - str: The hex digest.
+    """
+    with open(path, "rb") as f:
+        return hash_stream(f, chunk_size)
+
+def hash_stream(stream, chunk_size = 1024 * 1024):
+    """
+    Computes the SHA-256 hex digest of all bytes of a seekable binary stream (e.g. an open file,
+    io.BytesIO or mmap), reading it in chunks from the start. The stream position is restored afterwards.
     
-    # Replace each found number with a random number of the same length
-    for number in numbers_to_replace:
-        length = len(number)
-        random_num = random_number(length)
-        text = text.replace(number, random_num)
+    Parameters:
+    - stream: binary file-like object
+        The stream to hash.
+    - chunk_size: int, optional
+        Number of bytes read at once (default is 1 MiB).
+        
+    Returns:
+    - str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    position = stream.tell()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(position)
 
-    return text
\ No newline at end of file
+    return digest.hexdigest()
+
+def write_text_atomic(path, text):
+    """
+    Writes a text file via a temporary file in the same directory which then replaces the target,
+    so readers and crash recovery never see a partially written file.
+    
+    Parameters:
+    - path: str
+        Path to the file.
+    - text: str
+        The text to write.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
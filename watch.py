@@ -0,0 +1,121 @@
+import os
+import time
+
+def _open_inotify(directory):
+    '''
+    Returns an inotify instance watching directory for new or written files, or None if inotify is unavailable.
+    Uses the optional inotify_simple package (Linux only).
+    '''
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return None
+
+    try:
+        inotify = INotify()
+        inotify.add_watch(directory, flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO)
+    except OSError:
+        return None
+    return inotify
+
+class InboxWatcher:
+    '''
+    Watches a directory for new PDFs and hands them out in micro-batches once they are complete.
+
+    A PDF counts as complete once its size and modification time have not changed for settle_time seconds,
+    so files which are still being copied into the directory are not picked up. If the optional inotify_simple
+    package is installed, the directory is only rescanned after inotify reported a change or while files are
+    settling; otherwise it is polled every poll_interval seconds.
+
+    Attributes:
+        directory (str): The watched directory.
+        settle_time (float): Seconds a file's size and modification time must stay unchanged.
+        poll_interval (float): Seconds between scans (and between stop checks with inotify).
+        batch_size (int): Maximum number of files per batch.
+        batch_window (float): Seconds to wait for more files once the first file of a batch is ready.
+        use_inotify (bool): True if inotify is used, False if the directory is polled.
+    '''
+
+    def __init__(self, directory, settle_time = 2.0, poll_interval = 1.0, batch_size = 50, batch_window = 5.0, use_inotify = True):
+        self.directory = directory
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._inotify = _open_inotify(directory) if use_inotify else None
+        self.use_inotify = self._inotify is not None
+        # path -> (size, mtime_ns, time of the last observed change) of files which are not dispatched yet
+        self._pending = {}
+        # paths handed out in a batch, kept until they left the directory
+        self._dispatched = set()
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def scan(self):
+        '''
+        Rescans the directory and returns the paths of all complete, not yet dispatched PDFs, oldest first.
+        '''
+        now = time.monotonic()
+        present = set()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pdf"):
+                continue
+            present.add(entry.path)
+            if entry.path in self._dispatched:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            previous = self._pending.get(entry.path)
+            if previous is None or previous[:2] != (stat.st_size, stat.st_mtime_ns):
+                self._pending[entry.path] = (stat.st_size, stat.st_mtime_ns, now)
+
+        self._dispatched &= present
+        for path in list(self._pending):
+            if path not in present:
+                del self._pending[path]
+
+        ready = [
+            (changed, path) for path, (_, _, changed) in self._pending.items()
+            if now - changed >= self.settle_time
+        ]
+        return [path for _, path in sorted(ready)]
+
+    def _wait(self):
+        if self._inotify is not None and not self._pending:
+            # nothing is settling, so only wake up for directory events (or to check for a stop request)
+            return bool(self._inotify.read(timeout=int(self.poll_interval * 1000)))
+        time.sleep(self.poll_interval)
+        return True
+
+    def next_batch(self, stop_event = None):
+        '''
+        Blocks until a batch of complete PDFs is available and returns it. Once the first file is ready, \
+        more files are collected for up to batch_window seconds or until batch_size files are ready.
+
+        Args:
+            stop_event (threading.Event, optional): If set while waiting, None is returned.
+
+        Returns:
+            List[str]: Paths of the PDFs in the batch, or None if stop_event was set.
+        '''
+        ready = self.scan()
+        first_ready = time.monotonic() if ready else None
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            if ready and (len(ready) >= self.batch_size or time.monotonic() - first_ready >= self.batch_window):
+                batch = ready[:self.batch_size]
+                for path in batch:
+                    del self._pending[path]
+                    self._dispatched.add(path)
+                return batch
+
+            if self._wait():
+                ready = self.scan()
+                if ready and first_ready is None:
+                    first_ready = time.monotonic()